@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+
+import numpy as np
+
+from solver import (
+    SolverConfig,
+    Telemetry,
+    solve_decomposed,
+    solve_portfolio,
+    solve_scheduling,
+    validate_schedule,
+)
+from utils import load_cached_instance, read_instance
+
+
+def find_datasets(file_path: str) -> list[str]:
+    if os.path.isfile(file_path):
+        return [file_path] if file_path.endswith(".txt") else []
+    datasets = []
+    for root, _, files in os.walk(file_path):
+        for file in files:
+            if file.endswith(".txt"):
+                datasets.append(os.path.join(root, file))
+    return sorted(datasets)
+
+
+def split_cores(instances: int, jobs: int = None) -> tuple[int, int]:
+    """Splits the available cores into concurrent instances and workers per instance."""
+    cores = os.cpu_count() or 1
+    jobs = max(1, min(jobs or cores, instances))
+    return jobs, max(1, cores // jobs)
+
+
+def solve_instance(
+    instance, config: SolverConfig, telemetry: Telemetry, incumbent=None
+) -> tuple[dict, np.ndarray, np.ndarray]:
+    """Solves and validates the instance, returns the result fields with the
+    starts and modes, None without a solution. incumbent is passed on to a
+    plain solve."""
+    result = {}
+    starts = modes = None
+    if config.decomposition:
+        with telemetry.phase("decompose"):
+            starts, modes, objective, _ = solve_decomposed(instance, config)
+        result["status"] = "FEASIBLE"
+        result["objective"] = objective
+    elif config.portfolio:
+        portfolio = solve_portfolio(instance, config, telemetry=telemetry)
+        result["status"] = portfolio.status
+        result["bound"] = portfolio.bound
+        result["strategy"] = portfolio.strategy
+        starts, modes = portfolio.starts, portfolio.modes
+        result["objective"] = portfolio.objective
+    else:
+        solved = solve_scheduling(
+            instance, config=config, telemetry=telemetry, incumbent=incumbent
+        )
+        result["status"] = solved.status
+        result["bound"] = solved.bound
+        if solved.found:
+            starts, modes = solved.starts, solved.modes
+            result["objective"] = solved.objective
+    if result["status"] in ("OPTIMAL", "FEASIBLE"):
+        # every result is checked independently of the model
+        with telemetry.phase("validate"):
+            report = validate_schedule(instance, starts, modes)
+        result["valid"] = report.valid
+        if not report.valid:
+            result["violations"] = report.counts
+        ends = starts + instance.mode_durations[instance.mode_ptr[:-1] + modes]
+        makespans = np.maximum.reduceat(ends, instance.project_ptr[:-1])
+        result["makespans"] = dict(
+            zip(map(str, instance.pronr.tolist()), makespans.tolist())
+        )
+        tardiness = np.maximum(makespans - instance.due_date, 0)
+        result["tardiness"] = dict(
+            zip(map(str, instance.pronr.tolist()), tardiness.tolist())
+        )
+    return result, starts, modes
+
+
+def solve_file(file_path: str, config: SolverConfig, cache: bool = True) -> dict:
+    start = time.perf_counter()
+    result = {"file": file_path}
+    telemetry = Telemetry()
+    try:
+        with telemetry.phase("parse"):
+            instance = (
+                load_cached_instance(file_path) if cache else read_instance(file_path)
+            )
+        result.update(solve_instance(instance, config, telemetry)[0])
+    except Exception as e:
+        result["status"] = "ERROR"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["wall_time"] = round(time.perf_counter() - start, 4)
+    result["phases"] = telemetry.to_dict()["phases"]
+    result["stats"] = telemetry.stats
+    return result
+
+
+def run_batch(
+    file_path: str,
+    output: str,
+    jobs: int = None,
+    cache: bool = True,
+    config: SolverConfig = None,
+) -> list[dict]:
+    datasets = find_datasets(file_path)
+    if not datasets:
+        raise ValueError(f"no .txt datasets found in {file_path}")
+    jobs, workers = split_cores(len(datasets), jobs)
+    config = config or SolverConfig()
+    if not config.num_workers:
+        config = replace(config, num_workers=workers)
+    workers = config.num_workers
+    print(f"Solving {len(datasets)} datasets, {jobs} at a time with {workers} workers")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    results = []
+    with open(output, "a") as file, ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(solve_file, d, config, cache) for d in datasets]
+        for future in as_completed(futures):
+            result = future.result()
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            results.append(result)
+            invalid = " (INVALID schedule)" if result.get("valid") is False else ""
+            print(
+                f"[{len(results)}/{len(datasets)}] {result['file']}: "
+                f"{result['status']}{invalid} in {result['wall_time']}s"
+            )
+    return results
@@ -0,0 +1,222 @@
+"""
+Random multi-project instances in the PSPLIB format read by utils.file.
+
+Every project is a network of jobs numbered 1..jobs + 2, with a dummy
+supersource and supersink. Projects are generated from their own seed, so
+each section of the file regenerates them one at a time instead of keeping
+the whole instance in memory:
+    - complexity: average number of successors of a non-dummy job
+    - resource_factor: share of the resources a mode demands
+    - resource_strength: renewable capacity between the largest single
+      demand (0) and the peak of the earliest start schedule (1), and
+      nonrenewable capacity between the least and the most total demand
+    - modes: modes per non-dummy job, shorter modes demand more
+"""
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+
+LINE = "*" * 72
+# successors are drawn among the next WINDOW jobs, which keeps networks deep
+WINDOW = 20
+
+
+@dataclass
+class GeneratorConfig:
+    projects: int = 1
+    jobs: int = 30
+    complexity: float = 1.5
+    resource_factor: float = 0.5
+    resource_strength: float = 0.5
+    renewable: int = 4
+    nonrenewable: int = 0
+    modes: int = 1
+    release_spread: int = 0
+    seed: int = 0
+
+    @property
+    def resources(self) -> int:
+        return self.renewable + self.nonrenewable
+
+
+@dataclass
+class GeneratedProject:
+    release: int
+    succ_ptr: np.ndarray
+    successors: np.ndarray
+    durations: np.ndarray  # jobs x modes, dummies only use mode 0
+    demands: np.ndarray  # jobs x modes x resources
+
+    @property
+    def job_count(self) -> int:
+        return len(self.durations)
+
+
+def generate_project(config: GeneratorConfig, p: int) -> GeneratedProject:
+    """Generates project p (from 0) from the seed pair (config.seed, p)."""
+    rng = np.random.default_rng([config.seed, p])
+    n = config.jobs
+    sink = n + 1
+
+    # arcs between non-dummy jobs 1..n (0-based), always to a later job
+    counts = np.minimum(rng.poisson(config.complexity, n), WINDOW)
+    counts[-1] = 0
+    sources = np.repeat(np.arange(1, n + 1), counts)
+    targets = np.minimum(sources + rng.integers(1, WINDOW + 1, len(sources)), n)
+    arcs = np.unique(sources.astype(np.int64) * (n + 2) + targets)
+    sources, targets = arcs // (n + 2), arcs % (n + 2)
+
+    # jobs without predecessors follow the source, without successors the sink
+    jobs = np.arange(1, n + 1)
+    starts = jobs[np.bincount(targets, minlength=n + 2)[1 : n + 1] == 0]
+    ends = jobs[np.bincount(sources, minlength=n + 2)[1 : n + 1] == 0]
+    sources = np.concatenate((np.zeros(len(starts), np.int64), sources, ends))
+    targets = np.concatenate((starts, targets, np.full(len(ends), sink)))
+    order = np.lexsort((targets, sources))
+    sources, targets = sources[order], targets[order]
+    succ_ptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n + 2))))
+
+    modes, resources = config.modes, config.resources
+    durations = np.sort(rng.integers(1, 11, (n + 2, modes)), axis=1)
+    demands = rng.integers(1, 11, (n + 2, modes, resources))
+    demands *= rng.random((n + 2, 1, resources)) < config.resource_factor
+    # shorter modes demand more of every resource
+    demands = -np.sort(-demands, axis=1)
+    durations[[0, sink]] = 0
+    demands[[0, sink]] = 0
+
+    release = int(rng.integers(0, config.release_spread + 1))
+    return GeneratedProject(release, succ_ptr, targets, durations, demands)
+
+
+def earliest_starts(project: GeneratedProject) -> np.ndarray:
+    """Earliest starts in the first mode, arcs always point to later jobs."""
+    durations = project.durations[:, 0].tolist()
+    succ_ptr, successors = project.succ_ptr.tolist(), project.successors.tolist()
+    earliest = [0] * project.job_count
+    for j in range(project.job_count):
+        finish = earliest[j] + durations[j]
+        for s in successors[succ_ptr[j] : succ_ptr[j + 1]]:
+            if finish > earliest[s]:
+                earliest[s] = finish
+    return np.array(earliest, dtype=np.int64)
+
+
+def summarize(config: GeneratorConfig) -> tuple[list, int, np.ndarray]:
+    """First pass over the projects: their summary rows, the horizon and the
+    resource capacities."""
+    rows, horizon = [], 0
+    renewable = config.renewable
+    largest = np.zeros(renewable, dtype=np.int64)
+    least = np.zeros(config.nonrenewable, dtype=np.int64)
+    most = np.zeros(config.nonrenewable, dtype=np.int64)
+    # earliest start profile of all projects, which all end by this length
+    length = config.release_spread + (config.jobs + 2) * 10 + 1
+    diff = np.zeros((length + 1, renewable), dtype=np.int64)
+    for p in range(config.projects):
+        project = generate_project(config, p)
+        earliest = earliest_starts(project)
+        mpm = int(earliest[-1])
+        rows.append((p + 1, config.jobs, project.release, project.release + mpm, mpm))
+        horizon = max(horizon, project.release) + int(project.durations.max(1).sum())
+
+        largest = np.maximum(largest, project.demands[:, :, :renewable].max((0, 1)))
+        least += project.demands[:, :, renewable:].min(1).sum(0)
+        most += project.demands[:, :, renewable:].max(1).sum(0)
+        start = project.release + earliest
+        np.add.at(diff, start, project.demands[:, 0, :renewable])
+        np.add.at(
+            diff, start + project.durations[:, 0], -project.demands[:, 0, :renewable]
+        )
+    peak = np.cumsum(diff, axis=0).max(0, initial=0)
+
+    strength = config.resource_strength
+    capacities = np.concatenate(
+        (
+            largest + np.round(strength * (peak - largest)),
+            least + np.round(strength * (most - least)),
+        )
+    ).astype(np.int64)
+    return rows, horizon, capacities
+
+
+def write_instance(file_path: str, config: GeneratorConfig):
+    """Writes the instance section by section, holding one project at a time."""
+    rows, horizon, capacities = summarize(config)
+    names = [f"R{r + 1}" for r in range(config.renewable)]
+    names += [f"N{r + 1}" for r in range(config.nonrenewable)]
+    n = config.jobs + 2
+
+    with open(file_path, "w") as file:
+        file.write(f"{LINE}\n#General Information\n")
+        file.write(f"projects:  {config.projects}\n")
+        file.write(f"jobs (incl. supersource/sink ):  {config.projects * n}\n")
+        file.write(f"horizon:                         {horizon}\n")
+        file.write("RESOURCES\n")
+        file.write(f"  - renewable                 :  {config.renewable}   R\n")
+        file.write(f"  - nonrenewable              :  {config.nonrenewable}   N\n")
+        file.write("  - doubly constrained        :  0   D\n")
+        file.write(f"{LINE}\n#Projects summary\n")
+        file.write("pronr. \t#jobs \trel.date \tduedate \ttardcost \tMPM-Time\n")
+        rng = np.random.default_rng(config.seed)
+        for (pronr, jobs, release, due_date, mpm), tardcost in zip(
+            rows, rng.integers(1, 6, config.projects).tolist()
+        ):
+            file.write(
+                f" {pronr:>4} {jobs:>6} {release:>8} {due_date:>8} {tardcost:>8}"
+                f" {mpm:>8}\n"
+            )
+
+        file.write(f"{LINE}\n#Precedence relations\n")
+        file.write("#jobnr.    #modes  #successors   successors\n")
+        for p in range(config.projects):
+            project = generate_project(config, p)
+            succ_ptr = project.succ_ptr.tolist()
+            successors = (project.successors + 1).tolist()
+            file.writelines(
+                f"{j + 1:>6} {1 if j in (0, n - 1) else config.modes:>8}"
+                f" {succ_ptr[j + 1] - succ_ptr[j]:>8}     "
+                + " ".join(map(str, successors[succ_ptr[j] : succ_ptr[j + 1]]))
+                + "\n"
+                for j in range(n)
+            )
+
+        file.write(f"{LINE}\n#Duration and resources\n")
+        file.write("#jobnr. mode duration " + " ".join(names) + "\n")
+        for p in range(config.projects):
+            project = generate_project(config, p)
+            durations = project.durations.tolist()
+            demands = project.demands.tolist()
+            for j in range(n):
+                for m in range(1 if j in (0, n - 1) else config.modes):
+                    job = f"{j + 1:>6}" if m == 0 else " " * 6
+                    row = " ".join(f"{d:>3}" for d in demands[j][m])
+                    file.write(f"{job} {m + 1:>4} {durations[j][m]:>8}   {row}\n")
+
+        file.write(f"{LINE}\n#Resource availability\n#resource   qty\n")
+        for name, capacity in zip(names, capacities.tolist()):
+            file.write(f"{name}      {capacity}\n")
+        file.write(f"{LINE}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Random PSPLIB instance generator")
+    parser.add_argument("output", help="File to write the instance to")
+    parser.add_argument("-p", "--projects", type=int, default=1)
+    parser.add_argument("-j", "--jobs", type=int, default=30, help="Jobs per project")
+    parser.add_argument("-c", "--complexity", type=float, default=1.5)
+    parser.add_argument("--resource-factor", type=float, default=0.5)
+    parser.add_argument("--resource-strength", type=float, default=0.5)
+    parser.add_argument("-r", "--renewable", type=int, default=4)
+    parser.add_argument("-n", "--nonrenewable", type=int, default=0)
+    parser.add_argument("-m", "--modes", type=int, default=1)
+    parser.add_argument("--release-spread", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = vars(parser.parse_args())
+    write_instance(args.pop("output"), GeneratorConfig(**args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from utils import get_file_data, make_data
+from utils.file import read_instance
+
+
+def write_synthetic(
+    file_path: str, jobs: int, resources: int = 4, seed: int = 0, projects: int = 1
+):
+    """Writes an instance of projects with jobs each and layered precedence
+    networks, job numbers restart in every project."""
+    rng = random.Random(seed)
+    names = [f"R{r + 1}" for r in range(resources)]
+    line = "*" * 72
+    with open(file_path, "w") as file:
+        file.write(f"{line}\n#General Information\n")
+        file.write(f"projects:  {projects}\n")
+        file.write(f"jobs (incl. supersource/sink ):  {jobs * projects}\n")
+        file.write(f"horizon:                         {jobs * projects * 5}\n")
+        file.write("RESOURCES\n")
+        file.write(f"  - renewable                 :  {resources}   R\n")
+        file.write("  - nonrenewable              :  0   N\n")
+        file.write("  - doubly constrained        :  0   D\n")
+        file.write(f"{line}\n#Projects summary\n")
+        file.write("pronr. \t#jobs \trel.date \tduedate \ttardcost \tMPM-Time\n")
+        for p in range(1, projects + 1):
+            file.write(
+                f" {p}      {jobs - 2}      0         {jobs}        0         {jobs}\n"
+            )
+        file.write(f"{line}\n#Precedence relations\n")
+        file.write("#jobnr.    #modes  #successors   successors\n")
+        for _ in range(projects):
+            for j in range(1, jobs + 1):
+                successors = sorted(
+                    {rng.randint(j + 1, min(jobs, j + 20)) for _ in range(3)}
+                    if j < jobs
+                    else set()
+                )
+                row = " ".join(f"{s:>4}" for s in successors)
+                file.write(f"{j:>6}        1   {len(successors):>6}     {row}\n")
+        file.write(f"{line}\n#Duration and resources\n")
+        file.write("#jobnr. mode duration " + " ".join(f"{n:>4}" for n in names) + "\n")
+        for _ in range(projects):
+            for j in range(1, jobs + 1):
+                demands = " ".join(f"{rng.randint(0, 5):>4}" for _ in names)
+                file.write(f"{j:>6}      1  {rng.randint(1, 10):>4}  {demands}\n")
+        file.write(f"{line}\n#Resource availability\n#resource   qty\n")
+        for n in names:
+            file.write(f"{n}      {rng.randint(5, 15)}\n")
+        file.write(f"{line}\n")
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser benchmark")
+    parser.add_argument("-j", "--jobs", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for jobs in args.jobs:
+            file_path = os.path.join(tmp, f"synthetic_{jobs}.txt")
+            write_synthetic(file_path, jobs)
+            instance = read_instance(file_path)
+            legacy_data = make_data(get_file_data(file_path))
+            if legacy_data != (instance.info, instance.resources, instance.projects()):
+                raise AssertionError(f"parsers disagree on {jobs} jobs")
+
+            legacy = best_of(args.repeat, lambda: make_data(get_file_data(file_path)))
+            streaming = best_of(args.repeat, read_instance, file_path)
+            print(
+                f"{jobs:>8} jobs | legacy {legacy * 1000:>9.1f} ms | "
+                f"streaming {streaming * 1000:>9.1f} ms | "
+                f"speedup {legacy / streaming:>5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from solver import Telemetry, compute_bounds, get_config, solve_scheduling
+from utils import plot_results, read_instance
+
+from .parse import write_synthetic
+
+# (jobs per project, projects, resources)
+LADDER = [
+    (30, 1, 4),
+    (30, 10, 4),
+    (100, 10, 4),
+    (100, 50, 4),
+    (1000, 1, 4),
+    (1000, 10, 4),
+    (1000, 10, 8),
+    (2000, 10, 4),
+]
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# timings below this many seconds are too noisy to flag
+MIN_SECONDS = 0.05
+# import statement of each entry point, timed in a fresh interpreter
+IMPORTS = {
+    "cli": "import main",
+    "parse": "import utils.file",
+    "solve": "import solver.solver",
+    "tables": "import utils.print",
+    "plot": "import matplotlib.figure",
+}
+IMPORT_RUNS = 3
+
+
+def ladder_name(jobs: int, projects: int, resources: int) -> str:
+    return f"j{jobs}_p{projects}_r{resources}"
+
+
+def run_instance(file_path: str, config, plot_path: str) -> dict:
+    """Runs parse, preprocess, solve and plot on one instance, in a fresh
+    process so that the peak resident memory belongs to this instance."""
+    telemetry = Telemetry()
+    with telemetry.phase("parse"):
+        instance = read_instance(file_path)
+    with telemetry.phase("preprocess"):
+        bounds = compute_bounds(instance)
+    solved = solve_scheduling(
+        instance, config=config, bounds=bounds, telemetry=telemetry
+    )
+    result = {
+        "status": solved.status,
+        "objective": solved.objective,
+        "bound": solved.bound,
+    }
+    if solved.found:
+        with telemetry.phase("plot"):
+            plot_results(instance, solved.starts, output=plot_path)
+    result["phases"] = telemetry.to_dict()["phases"]
+    result["total"] = round(sum(result["phases"].values()), 6)
+    result["peak_mb"] = round(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+    )
+    return result
+
+
+def import_time(statement: str) -> float:
+    """Returns the fastest of IMPORT_RUNS timings of the statement, each in
+    a fresh interpreter so that nothing is imported yet."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    times = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=SCRIPTS,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        )
+        for _ in range(IMPORT_RUNS)
+    ]
+    return round(min(times), 6)
+
+
+def compare_imports(result: dict, baseline: dict, threshold: float) -> list[str]:
+    if baseline is None:
+        return []
+    return [
+        f"import {name}: {baseline[name]:.3f}s -> {seconds:.3f}s"
+        for name, seconds in result.items()
+        if name in baseline
+        and seconds > max(baseline[name] * (1 + threshold), MIN_SECONDS)
+    ]
+
+
+def compare(name: str, result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lists the regressions of a result against its baseline entry."""
+    if baseline is None:
+        return []
+    regressions = []
+    limit = 1 + threshold
+    for phase, seconds in result["phases"].items():
+        before = baseline["phases"].get(phase)
+        if before is not None and seconds > max(before * limit, MIN_SECONDS):
+            regressions.append(f"{name}: {phase} {before:.3f}s -> {seconds:.3f}s")
+    if result["peak_mb"] > baseline["peak_mb"] * limit:
+        regressions.append(
+            f"{name}: peak memory {baseline['peak_mb']} -> {result['peak_mb']} MB"
+        )
+    before, after = baseline["objective"], result["objective"]
+    if before is not None and (after is None or after > before * limit):
+        regressions.append(f"{name}: objective {before} -> {after}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark")
+    parser.add_argument("--only", nargs="+", help="Run only these ladder entries")
+    parser.add_argument("-t", "--time-limit", type=float, default=10.0)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("-o", "--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    config = get_config(
+        time_limit=args.time_limit, num_workers=1, random_seed=0, warm_start="lft"
+    )
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    imports = {name: import_time(statement) for name, statement in IMPORTS.items()}
+    regressions = compare_imports(imports, baseline.get("imports"), args.threshold)
+    print("imports | " + " ".join(f"{k} {v:.3f}s" for k, v in imports.items()))
+
+    results = {"imports": imports}
+    with tempfile.TemporaryDirectory() as tmp:
+        for jobs, projects, resources in LADDER:
+            name = ladder_name(jobs, projects, resources)
+            if args.only and name not in args.only:
+                continue
+            file_path = os.path.join(tmp, f"{name}.txt")
+            write_synthetic(file_path, jobs, resources, seed=0, projects=projects)
+            # one process per instance keeps the peak memory apart
+            with ProcessPoolExecutor(1) as pool:
+                result = pool.submit(
+                    run_instance, file_path, config, os.path.join(tmp, f"{name}.png")
+                ).result()
+            results[name] = result
+            regressions += compare(name, result, baseline.get(name), args.threshold)
+            phases = " ".join(f"{k} {v:.3f}s" for k, v in result["phases"].items())
+            print(
+                f"{name:>16} | {result['status']:>10} | objective {result['objective']}"
+                f" | {result['peak_mb']:>7} MB | {phases}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump({**baseline, **results}, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Client of the local scheduling service, on the standard library only so it
+runs wherever the service does, without a network beyond localhost.
+"""
+
+import json
+from typing import Iterator
+from urllib.parse import quote
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class ServiceError(Exception):
+    """An HTTP error status and its message, raised by the service and the
+    client alike."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+    def __str__(self):
+        return f"{self.status}: {self.args[0]}"
+
+
+class ServiceClient:
+    def __init__(self, host: str = HOST, port: int = PORT, timeout: float = None):
+        self.host, self.port, self.timeout = host, port, timeout
+
+    def connect(self, method: str, path: str, body: bytes = None, content_type=None):
+        # imported on use, main reads the defaults above on every command
+        import http.client
+
+        connection = http.client.HTTPConnection(self.host, self.port, self.timeout)
+        headers = {"Content-Type": content_type} if content_type else {}
+        connection.request(method, path, body, headers)
+        return connection, connection.getresponse()
+
+    def request(self, method: str, path: str, payload: dict = None) -> dict:
+        body = None if payload is None else json.dumps(payload).encode()
+        connection, response = self.connect(method, path, body, "application/json")
+        try:
+            data = json.loads(response.read() or b"{}")
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise ServiceError(response.status, data.get("error", response.reason))
+        return data
+
+    def submit(
+        self,
+        psplib: str = None,
+        instance: dict = None,
+        preset: str = None,
+        config: dict = None,
+    ) -> dict:
+        """Queues PSPLIB text or a JSON instance as written by --save, solved
+        with the preset and the SolverConfig overrides in config."""
+        payload = {"preset": preset, "config": config or {}}
+        if psplib is not None:
+            payload["psplib"] = psplib
+        elif instance is not None:
+            payload["instance"] = instance
+        else:
+            raise ValueError("psplib or instance is required")
+        return self.request("POST", "/jobs", payload)
+
+    def submit_file(self, file_path: str, preset: str = None, config=None) -> dict:
+        with open(file_path, "r") as file:
+            if file_path.endswith(".json"):
+                return self.submit(
+                    instance=json.load(file), preset=preset, config=config
+                )
+            return self.submit(psplib=file.read(), preset=preset, config=config)
+
+    def jobs(self) -> list[dict]:
+        return self.request("GET", "/jobs")["jobs"]
+
+    def job(self, job_id: str) -> dict:
+        return self.request("GET", f"/jobs/{quote(job_id)}")
+
+    def cancel(self, job_id: str) -> dict:
+        return self.request("DELETE", f"/jobs/{quote(job_id)}")
+
+    def events(self, job_id: str) -> Iterator[dict]:
+        """Yields the state changes and incumbents of the job as they come,
+        the last event is its end."""
+        connection, response = self.connect("GET", f"/jobs/{quote(job_id)}/events")
+        try:
+            if response.status >= 400:
+                data = json.loads(response.read() or b"{}")
+                raise ServiceError(response.status, data.get("error", response.reason))
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+    def wait(self, job_id: str) -> dict:
+        """Blocks until the job has ended and returns it with its result."""
+        for _ in self.events(job_id):
+            pass
+        return self.job(job_id)
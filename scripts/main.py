@@ -1,62 +1,408 @@
+"""
+Command line entry point with one subcommand per task:
+    - parse: read and validate datasets, optionally print their tables
+    - solve: solve datasets, tables, schedules and plots on request
+    - plot: solve datasets and plot the schedules
+    - batch: solve datasets headless in a process pool
+    - validate: check a schedule file against its dataset
+    - serve: run the scheduling service on localhost
+    - submit: solve datasets on the service, printing incumbents as they come
+Each subcommand imports only what it needs: OR-Tools is loaded to solve,
+tabulate to print tables and matplotlib to plot.
+"""
+
 import argparse
 import os
+import sys
 from logging import error
 
-from solver import solve_scheduling, tiebreaker
-from utils import (
-    get_file_data,
-    plot_results,
-    make_data,
-    print_tables,
-    print_makespans,
+from client import HOST, PORT
+from solver import (
+    DECOMPOSITIONS,
+    OBJECTIVES,
+    PRESETS,
+    PRIORITY_RULES,
+    Telemetry,
+    get_config,
 )
 
 
-def solve_dataset(data):
-    info, resources, projects = make_data(data)
-    print_tables(info, resources, projects)
+def find_files(file_path: str) -> list[str]:
+    datasets = []
+    if os.path.isdir(file_path):
+        for root, _, files in os.walk(file_path):
+            for file in files:
+                if file.endswith(".txt"):
+                    datasets.append(os.path.join(root, file))
+    elif os.path.isfile(file_path) and file_path.endswith(".txt"):
+        datasets.append(file_path)
+    return datasets
+
+
+def load_dataset(
+    file_path: str, save: bool, cache: bool = True, telemetry: Telemetry = None
+):
+    from utils import get_file_data, load_cached_instance, read_instance
+
+    telemetry = telemetry or Telemetry()
+    if save:
+        with telemetry.phase("save"):
+            get_file_data(file_path, save)
+    with telemetry.phase("parse"):
+        if cache:
+            return load_cached_instance(file_path)
+        return read_instance(file_path)
+
 
-    status, solver, job_vars, solutions = solve_scheduling(
-        projects, resources, info.horizon, tiebreaker
+def print_dataset_tables(instance):
+    from utils import print_tables
+
+    print_tables(instance.info, instance.resources, instance.projects())
+
+
+def parse_dataset(instance, tables: bool = False, telemetry: Telemetry = None):
+    """Prints the size of the instance and checks its precedence graph."""
+    from solver import build_precedence_graph
+
+    telemetry = telemetry or Telemetry()
+    if tables:
+        print_dataset_tables(instance)
+    print(
+        f"Projects: {instance.project_count}, jobs: {instance.job_count}, "
+        f"modes: {len(instance.mode_durations)}, "
+        f"resources: {len(instance.resources)}, horizon: {instance.horizon}"
+    )
+    with telemetry.phase("validate"):
+        graph = build_precedence_graph(instance)
+    print(graph)
+
+
+def solve_dataset(
+    instance,
+    config,
+    heuristic_only: bool = False,
+    schedule: bool = False,
+    plot: dict = None,
+    telemetry: Telemetry = None,
+    tables: bool = False,
+    output: str = None,
+    results: bool = False,
+):
+    """Solves the instance, plot holds the plot_results arguments or is None
+    to skip plotting and output names a file to write the schedule to. With
+    results, a plain solve is looked up in and stored to the result cache."""
+    from solver import (
+        compute_bounds,
+        heuristic_schedule,
+        solve_decomposed,
+        solve_portfolio,
+        solve_scheduling,
+        tiebreaker,
     )
-    print_makespans(solutions)
-    print(f"Solver status: {solver.StatusName(status)}")
-    print(f"Objective value: {solver.ObjectiveValue()}")
 
-    plot_results(resources, projects, solver, job_vars)
+    telemetry = telemetry or Telemetry()
+    if tables:
+        print_dataset_tables(instance)
+
+    key = cached = hint = None
+    # only plain solves go through the result cache
+    if results and not (heuristic_only or config.decomposition or config.portfolio):
+        from utils import load_result, result_key
+
+        key = result_key(instance, config)
+        cached = load_result(key)
+    if cached is not None and cached.covers(config.time_limit):
+        print(cached)
+        print(f"Solver status: {cached.status}")
+        print(f"Objective value: {cached.objective}")
+        telemetry.counts["cached_result"] = 1
+        telemetry.stats = cached.stats
+        show_schedule(
+            instance, cached.starts, cached.modes, schedule, plot, telemetry, output
+        )
+        return
+    if cached is not None:
+        # a larger budget resumes from the cached schedule
+        print(f"{cached}, used as hint")
+        hint = (cached.starts, cached.modes)
+
+    bounds = None
+    if config.preprocess or heuristic_only:
+        with telemetry.phase("preprocess"):
+            bounds = compute_bounds(instance)
+        print(f"{bounds}\n")
+
+    if heuristic_only:
+        with telemetry.phase("heuristic"):
+            result = heuristic_schedule(
+                instance,
+                config.warm_start or "lft",
+                config.passes,
+                config.random_seed,
+                bounds,
+            )
+        if result is None:
+            print("Heuristic found no modes within the nonrenewable capacities")
+            return
+        starts, modes, makespan = result
+        print(f"Heuristic makespan: {makespan}")
+        show_schedule(instance, starts, modes, schedule, plot, telemetry, output)
+        return
+
+    if config.decomposition:
+        with telemetry.phase("decompose"):
+            starts, modes, objective, trajectory = solve_decomposed(
+                instance, config, bounds
+            )
+        telemetry.trace = [list(point) for point in trajectory]
+        for seconds, value in trajectory:
+            print(f"{seconds:8.2f}s  objective {value}")
+        print(f"Objective value: {objective}")
+        show_schedule(instance, starts, modes, schedule, plot, telemetry, output)
+        return
+
+    if config.portfolio:
+        result = solve_portfolio(instance, config, bounds, telemetry=telemetry)
+        print(result)
+        print(f"Solver status: {result.status}")
+        print(f"Objective value: {result.objective}")
+        if result.starts is not None:
+            show_schedule(
+                instance,
+                result.starts,
+                result.modes,
+                schedule,
+                plot,
+                telemetry,
+                output,
+            )
+        return
+
+    result = solve_scheduling(
+        instance, tiebreaker, config, bounds, hint=hint, telemetry=telemetry
+    )
+    if telemetry.counts.get("removed_arcs"):
+        print(f"Implied precedence arcs removed: {telemetry.counts['removed_arcs']}")
+    if tables:
+        from utils import print_makespans
+
+        print_makespans(result.solutions)
+    print(f"Solver status: {result.status}")
+    print(f"Objective value: {result.objective}")
+    if config.tiebreak and result.solutions:
+        print(f"Makespan: {min(m for _, m in result.solutions)}")
+    if result.start_sum is not None:
+        print(f"Start time sum: {result.start_sum}")
+
+    if not result.found:
+        return
+    report = show_schedule(
+        instance, result.starts, result.modes, schedule, plot, telemetry, output
+    )
+    if key is None or not report.valid:
+        return
+    from utils import CachedResult, save_result
+
+    entry = CachedResult(
+        result.status,
+        result.objective,
+        result.bound,
+        result.starts,
+        result.modes,
+        config.time_limit,
+        telemetry.stats,
+    )
+    if entry.replaces(cached):
+        save_result(key, entry)
+
+
+def show_schedule(instance, starts, modes, schedule, plot, telemetry, output=None):
+    """Validates the schedule, then writes, prints and plots it on request.
+    Returns the validation report."""
+    from solver import validate_schedule
+
+    with telemetry.phase("validate"):
+        report = validate_schedule(instance, starts, modes)
+    print(report)
+    if output:
+        from utils import write_schedule
+
+        write_schedule(output, instance, starts, modes)
+    if instance.multi_mode:
+        instance = instance.with_modes(modes)
+    if schedule:
+        from utils import print_schedule
+
+        print_schedule(instance, starts)
+    if plot is not None:
+        from utils import plot_results
+
+        with telemetry.phase("plot"):
+            plot_results(instance, starts, **plot)
+    return report
+
+
+def validate_dataset(instance, schedule_path: str, telemetry: Telemetry = None):
+    from solver import validate_schedule
+    from utils import read_schedule
+
+    telemetry = telemetry or Telemetry()
+    starts, modes = read_schedule(schedule_path, instance)
+    with telemetry.phase("validate"):
+        report = validate_schedule(instance, starts, modes)
+    print(report)
+    return report
+
+
+def submit_dataset(file: str, config, host: str, port: int):
+    """Queues the dataset on the service and prints its incumbents as they
+    come, Ctrl-C cancels the job."""
+    from dataclasses import asdict
+
+    from client import ServiceClient
+
+    client = ServiceClient(host, port)
+    job = client.submit_file(file, config=asdict(config))
+    print(f"Job {job['id']}: {job['state']}, time limit {job['time_limit']}s")
+    try:
+        for event in client.events(job["id"]):
+            if event["event"] == "incumbent":
+                print(
+                    f"{event['time']:8.2f}s  objective {event['objective']}"
+                    f"  bound {event['bound']}"
+                )
+    except KeyboardInterrupt:
+        client.cancel(job["id"])
+    job = client.wait(job["id"])
+    result = job.get("result") or {}
+    print(f"Job {job['id']}: {job['state']}")
+    if job.get("error"):
+        print(f"Error: {job['error']}")
+    print(f"Solver status: {result.get('status')}")
+    print(f"Objective value: {result.get('objective')}")
+
+
+def schedule_path(output: str, file: str, datasets: int) -> str:
+    """Names the output of every dataset after it when there are several."""
+    if not output or datasets == 1:
+        return output
+    root, ext = os.path.splitext(output)
+    name = os.path.splitext(os.path.basename(file))[0]
+    return f"{root}_{name}{ext}"
+
+
+def solver_config(args: argparse.Namespace):
+    return get_config(
+        args.preset,
+        num_workers=args.workers,
+        time_limit=args.time_limit,
+        relative_gap=args.gap,
+        random_seed=args.seed,
+        log_search=args.log_search or None,
+        collect=args.collect,
+        keep=args.keep,
+        tiebreak=args.tiebreak,
+        preprocess=False if args.no_preprocess else None,
+        warm_start=args.heuristic,
+        passes=args.passes,
+        objective=args.objective,
+        makespan_weight=args.makespan_weight,
+        decomposition=args.decompose,
+        neighbourhood=args.neighbourhood,
+        iteration_time=args.iteration_time,
+        portfolio=args.portfolio or None,
+    )
+
+
+def plot_options(args: argparse.Namespace, file: str, datasets: int) -> dict:
+    """Returns the plot_results arguments for a dataset, None to skip plotting."""
+    if args.command == "solve" and args.plot is None:
+        return None
+    plot = {"max_rows": args.max_rows, "max_days": args.max_days}
+    plot = {k: v for k, v in plot.items() if v is not None}
+    output = args.plot if args.command == "solve" else args.output
+    if output:
+        plot["output"] = schedule_path(output, file, datasets)
+    return plot
 
 
 def main():
-    os.system("cls" if os.name == "nt" else "clear")
     args = get_args()
-    file_path = args.file
-    save = args.save
+    if args.command == "serve":
+        from service import run_service
+
+        run_service(args.host, args.port, args.jobs, args.max_time, args.max_queue)
+        return
+
+    cache = not args.no_cache
+
+    if args.clear_cache:
+        from utils import clear_cache, clear_results
 
-    if not file_path or not os.path.exists(file_path):
+        clear_cache()
+        clear_results()
+
+    if not args.file or not os.path.exists(args.file):
         error("Invalid file path")
         return
 
-    datasets = []
-    if os.path.isdir(file_path):
-        for root, _, files in os.walk(file_path):
-            for file in files:
-                if file.endswith(".txt"):
-                    datasets.append(
-                        (file, get_file_data(os.path.join(root, file), save))
-                    )
-    elif os.path.isfile(file_path) and file_path.endswith(".txt"):
-        datasets.append((file_path, get_file_data(file_path, save)))
+    if args.command == "batch":
+        from batch import run_batch
+
+        run_batch(args.file, args.output, args.jobs, cache, solver_config(args))
+        return
+
+    datasets = find_files(args.file)
+    if args.command == "submit":
+        from client import ServiceError
 
-    for file, data in datasets:
+        config = solver_config(args)
+        for file in datasets:
+            print(f"Dataset: {file}")
+            try:
+                submit_dataset(file, config, args.host, args.port)
+            except ConnectionError:
+                error(f"No service on {args.host}:{args.port}")
+                return
+            except ServiceError as e:
+                error(f"Job refused: {e}")
+            print()
+        return
+
+    solving = args.command in ("solve", "plot")
+    config = solver_config(args) if solving else None
+    invalid = 0
+    for file in datasets:
+        telemetry = Telemetry()
+        instance = load_dataset(file, args.save, cache, telemetry)
         print(f"Dataset: {file}")
-        solve_dataset(data)
-        os.system("cls" if os.name == "nt" else "clear")
+        if args.command == "parse":
+            parse_dataset(instance, args.tables, telemetry)
+        elif args.command == "validate":
+            report = validate_dataset(instance, args.schedule, telemetry)
+            invalid += not report.valid
+        else:
+            solve_dataset(
+                instance,
+                config,
+                args.heuristic_only,
+                args.print_schedule,
+                plot_options(args, file, len(datasets)),
+                telemetry,
+                args.tables,
+                schedule_path(args.save_schedule, file, len(datasets)),
+                not args.no_results,
+            )
+        if args.telemetry:
+            telemetry.write(args.telemetry, file=file)
+        print()
 
-    return
+    if invalid:
+        sys.exit(1)
 
 
-def get_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Project Scheduling")
+def dataset_arguments() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument(
         "-f", "--file", help="Path to the file containing the project data"
     )
@@ -66,6 +412,241 @@ def get_args() -> argparse.Namespace:
         action="store_true",
         help="Save the parsed data to a JSON file",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse the dataset files without reading or writing the instance cache",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached instances and solver results before loading",
+    )
+    parser.add_argument(
+        "--telemetry",
+        help="Append phase timings, solver statistics and the solution trace "
+        "of every dataset to this JSON lines file",
+    )
+    return parser
+
+
+def solver_arguments() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "-p",
+        "--preset",
+        choices=list(PRESETS),
+        help="Solver preset: fast (first feasible), balanced or optimal",
+    )
+    parser.add_argument(
+        "-t", "--time-limit", type=float, help="Solver time limit in seconds"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, help="Number of CP-SAT search workers"
+    )
+    parser.add_argument(
+        "--gap", type=float, help="Stop at this relative optimality gap"
+    )
+    parser.add_argument("--seed", type=int, help="Solver random seed")
+    parser.add_argument(
+        "--log-search", action="store_true", help="Print the CP-SAT search log"
+    )
+    parser.add_argument(
+        "--collect",
+        choices=["best", "trace", "all"],
+        help="Keep the best --keep solutions, only the objective trace or all solutions",
+    )
+    parser.add_argument(
+        "--keep", type=int, help="Number of best solutions kept by --collect best"
+    )
+    parser.add_argument(
+        "--tiebreak",
+        choices=["lexicographic", "weighted"],
+        help="Break makespan ties by the sum of start times inside the model",
+    )
+    parser.add_argument(
+        "--no-preprocess",
+        action="store_true",
+        help="Skip the critical path bounds on start times and makespan",
+    )
+    parser.add_argument(
+        "--heuristic",
+        choices=list(PRIORITY_RULES),
+        help="Hint the solver with a serial schedule built by this priority rule",
+    )
+    parser.add_argument(
+        "--passes",
+        type=int,
+        help="Number of heuristic passes, all but the first are randomized",
+    )
+    parser.add_argument(
+        "--objective",
+        choices=list(OBJECTIVES),
+        help="Minimize the makespan, the weighted project tardiness or both",
+    )
+    parser.add_argument(
+        "--makespan-weight",
+        type=int,
+        help="Weight of the makespan in the combined objective",
+    )
+    parser.add_argument(
+        "--decompose",
+        choices=list(DECOMPOSITIONS),
+        help="Improve a heuristic schedule by re-solving project subsets or "
+        "rolling time windows within --time-limit",
+    )
+    parser.add_argument(
+        "--neighbourhood",
+        type=int,
+        help="Number of jobs freed per --decompose iteration",
+    )
+    parser.add_argument(
+        "--iteration-time",
+        type=float,
+        help="Time limit in seconds of each --decompose iteration",
+    )
+    parser.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="Race several search strategies in parallel and keep the best",
+    )
+    return parser
+
+
+def output_arguments(plot_flag: bool) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--heuristic-only",
+        action="store_true",
+        help="Only build the heuristic schedule, without running the solver",
+    )
+    parser.add_argument(
+        "--no-results",
+        action="store_true",
+        help="Solve without reading or writing the result cache",
+    )
+    parser.add_argument(
+        "--tables",
+        action="store_true",
+        help="Print the instance tables and the makespan of every project",
+    )
+    parser.add_argument(
+        "--print-schedule",
+        action="store_true",
+        help="Print the schedule and resource usage tables",
+    )
+    parser.add_argument(
+        "--save-schedule",
+        help="Write the schedule as pronr jobnr mode start rows to this file",
+    )
+    if plot_flag:
+        parser.add_argument(
+            "--plot",
+            nargs="?",
+            const="",
+            help="Plot the schedule, to this file (.png, .svg) if given",
+        )
+    else:
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="Write the schedule figure to this file (.png, .svg) "
+            "instead of showing it",
+        )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        help="Gantt rows before jobs are grouped by project or in blocks",
+    )
+    parser.add_argument(
+        "--max-days",
+        type=int,
+        help="Resource usage columns before days are merged by their peak",
+    )
+    return parser
+
+
+def service_arguments() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--host", default=HOST, help="Address of the service")
+    parser.add_argument("--port", type=int, default=PORT, help="Port of the service")
+    return parser
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Project Scheduling")
+    commands = parser.add_subparsers(dest="command", required=True)
+    datasets, solver = dataset_arguments(), solver_arguments()
+
+    parse = commands.add_parser(
+        "parse", parents=[datasets], help="Read and validate the datasets"
+    )
+    parse.add_argument(
+        "--tables", action="store_true", help="Print the instance tables"
+    )
+    commands.add_parser(
+        "solve",
+        parents=[datasets, solver, output_arguments(plot_flag=True)],
+        help="Solve the datasets",
+    )
+    commands.add_parser(
+        "plot",
+        parents=[datasets, solver, output_arguments(plot_flag=False)],
+        help="Solve the datasets and plot their schedules",
+    )
+    batch = commands.add_parser(
+        "batch",
+        parents=[datasets, solver],
+        help="Solve the datasets headless in a process pool and write a results file",
+    )
+    batch.add_argument(
+        "-o",
+        "--output",
+        default="results.jsonl",
+        help="Results file appended to",
+    )
+    batch.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of datasets solved concurrently",
+    )
+    serve = commands.add_parser(
+        "serve",
+        parents=[service_arguments()],
+        help="Run the scheduling service on localhost",
+    )
+    serve.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of jobs solved concurrently, the cores are split between them",
+    )
+    serve.add_argument(
+        "--max-time",
+        type=float,
+        help="Cap on the time limit of every job in seconds, 60 by default",
+    )
+    serve.add_argument(
+        "--max-queue",
+        type=int,
+        help="Number of queued jobs before submissions are refused, 16 by default",
+    )
+    commands.add_parser(
+        "submit",
+        parents=[datasets, solver, service_arguments()],
+        help="Solve the datasets on the service and print the incumbents as they come",
+    )
+    validate = commands.add_parser(
+        "validate",
+        parents=[datasets],
+        help="Check a schedule against the dataset, exit 1 if it is invalid",
+    )
+    validate.add_argument(
+        "--schedule",
+        required=True,
+        help="Schedule file of pronr jobnr mode start rows, modes from 1",
+    )
     return parser.parse_args()
 
 
@@ -0,0 +1,400 @@
+"""
+Local scheduling service: an HTTP/JSON server on localhost that keeps
+OR-Tools loaded between requests and solves the submitted instances on a
+bounded pool of threads. CP-SAT releases the GIL while it searches, so the
+solves run alongside each other and the event loop.
+    POST   /jobs              queue an instance, PSPLIB text or JSON
+    GET    /jobs              list the jobs
+    GET    /jobs/<id>         the job, with its result once it has ended
+    GET    /jobs/<id>/events  state changes and incumbents as JSON lines
+    DELETE /jobs/<id>         cancel a queued or running job
+A JSON body holds "psplib" text or an "instance" as written by --save, an
+optional "preset" and SolverConfig overrides in "config". Any other body is
+PSPLIB text, with the preset and the overrides in the query string. Time
+limits and search workers are capped by the service, at most max_queue jobs
+wait for a thread and a cancelled solve returns its best schedule so far.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, replace
+from urllib.parse import parse_qsl, urlsplit
+
+from batch import solve_instance, split_cores
+from client import HOST, PORT, ServiceError
+from solver import SolverConfig, Telemetry, get_config
+from structs import Instance
+from utils import make_data, parse_instance
+
+# default cap on the time limit of a job, in seconds
+MAX_TIME = 60.0
+MAX_QUEUE = 16
+MAX_BODY = 64 << 20
+# ended jobs kept for their results, the oldest are forgotten first
+MAX_JOBS = 1000
+# seconds between checks of a running solve
+POLL_INTERVAL = 0.1
+# modes without a single search to stream and stop
+UNSUPPORTED = ("decomposition", "portfolio")
+ENDED = ("done", "failed", "cancelled")
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    503: "Service Unavailable",
+}
+
+
+@dataclass
+class Job:
+    id: str
+    instance: Instance
+    config: SolverConfig
+    loop: asyncio.AbstractEventLoop
+    state: str = "queued"
+    submitted: float = field(default_factory=time.time)
+    updates: list = field(default_factory=list)
+    result: dict = None
+    error: str = None
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def ended(self) -> bool:
+        return self.state in ENDED
+
+    def notify(self):
+        """Wakes the event streams of the job, on the event loop."""
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def start(self):
+        if self.state == "queued":
+            self.state = "running"
+            self.notify()
+
+    def add_updates(self, points: list[tuple]):
+        self.updates += [
+            {"time": round(seconds, 3), "objective": objective, "bound": bound}
+            for seconds, objective, bound in points
+        ]
+        self.notify()
+
+    @contextmanager
+    def watch(self, solver, collector):
+        """Streams the solutions of the running search to the job and stops
+        it once the job is cancelled, see solve_scheduling."""
+        done = threading.Event()
+        sent = 0
+
+        def publish():
+            nonlocal sent
+            points = collector.trace[sent:]
+            sent += len(points)
+            if points:
+                self.loop.call_soon_threadsafe(self.add_updates, points)
+
+        def poll():
+            while not done.wait(POLL_INTERVAL):
+                publish()
+                if self.cancelled.is_set():
+                    solver.StopSearch()
+
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+            publish()
+
+    def to_dict(self, result: bool = True) -> dict:
+        job = {
+            "id": self.id,
+            "state": self.state,
+            "submitted": self.submitted,
+            "time_limit": self.config.time_limit,
+            "incumbent": self.updates[-1] if self.updates else None,
+        }
+        if self.error:
+            job["error"] = self.error
+        if result and self.result is not None:
+            job["result"] = self.result
+        return job
+
+
+def parse_value(value: str):
+    """Reads a query string value as JSON, or as text if it is not."""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def read_job(body: bytes, content_type: str, query: dict) -> tuple[Instance, dict]:
+    """Returns the instance and the preset and overrides of a job request."""
+    if content_type.startswith("application/json"):
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise ValueError("expected a JSON object")
+    else:
+        query = {k: parse_value(v) for k, v in query.items()}
+        request = {
+            "psplib": body.decode(),
+            "preset": query.pop("preset", None),
+            "config": query,
+        }
+    try:
+        if "psplib" in request:
+            instance = parse_instance(request["psplib"].splitlines())
+        elif "instance" in request:
+            instance = Instance.from_projects(*make_data(request["instance"]))
+        else:
+            raise ValueError('expected "psplib" text or an "instance"')
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ValueError(f"invalid instance: {type(e).__name__}: {e}")
+    return instance, {"preset": request.get("preset"), **(request.get("config") or {})}
+
+
+class Service:
+    def __init__(
+        self, workers: int = None, max_time: float = MAX_TIME, max_queue=MAX_QUEUE
+    ):
+        cores = os.cpu_count() or 1
+        self.workers, self.search_workers = split_cores(workers or cores, workers)
+        self.max_time, self.max_queue = max_time, max_queue
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="solve")
+        self.jobs = {}
+        self.tasks = set()
+        self.ids = itertools.count(1)
+
+    def job_config(self, preset: str = None, **overrides) -> SolverConfig:
+        """The solver configuration of a job, capped to the service limits."""
+        unknown = set(overrides) - {f.name for f in fields(SolverConfig)}
+        if unknown:
+            raise ValueError(f"unknown solver parameters: {', '.join(sorted(unknown))}")
+        config = get_config(preset, **overrides)
+        if any(getattr(config, name) for name in UNSUPPORTED):
+            raise ValueError(
+                "the service runs plain solves, not decomposition or portfolio"
+            )
+        # its second search would run outside Job.watch
+        if config.tiebreak == "lexicographic":
+            raise ValueError(
+                "the service runs a single search, use the weighted tiebreak"
+            )
+        return replace(
+            config,
+            time_limit=min(config.time_limit or self.max_time, self.max_time),
+            num_workers=min(
+                config.num_workers or self.search_workers, self.search_workers
+            ),
+            log_search=False,
+        )
+
+    def submit(self, instance: Instance, config: SolverConfig) -> Job:
+        if sum(job.state == "queued" for job in self.jobs.values()) >= self.max_queue:
+            raise ServiceError(503, f"{self.max_queue} jobs already queued")
+        job = Job(str(next(self.ids)), instance, config, asyncio.get_running_loop())
+        self.jobs[job.id] = job
+        task = asyncio.create_task(self.run(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        self.forget()
+        return job
+
+    def forget(self):
+        ended = [job.id for job in self.jobs.values() if job.ended]
+        for job_id in ended[: max(len(ended) - MAX_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    def cancel(self, job: Job):
+        if job.ended:
+            return
+        job.cancelled.set()
+        if job.state == "queued":
+            job.state = "cancelled"
+            job.notify()
+
+    async def run(self, job: Job):
+        loop = asyncio.get_running_loop()
+        try:
+            job.result = await loop.run_in_executor(self.pool, self.solve, job)
+        except Exception as e:
+            job.state, job.error = "failed", f"{type(e).__name__}: {e}"
+        else:
+            job.state = "cancelled" if job.cancelled.is_set() else "done"
+        job.instance = None
+        job.notify()
+
+    def solve(self, job: Job) -> dict:
+        """Solves a job on a pool thread, None if it was cancelled first."""
+        if job.cancelled.is_set():
+            return None
+        job.loop.call_soon_threadsafe(job.start)
+        start = time.perf_counter()
+        telemetry = Telemetry()
+        result, starts, modes = solve_instance(job.instance, job.config, telemetry, job)
+        if starts is not None:
+            instance = job.instance
+            # rows of pronr jobnr mode start, modes from 1, as write_schedule
+            result["schedule"] = [
+                list(row)
+                for row in zip(
+                    instance.pronr[instance.job_project].tolist(),
+                    instance.jobnr.tolist(),
+                    (modes + 1).tolist(),
+                    starts.tolist(),
+                )
+            ]
+        result["wall_time"] = round(time.perf_counter() - start, 4)
+        result["phases"] = telemetry.to_dict()["phases"]
+        result["stats"] = telemetry.stats
+        return result
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                status, payload = await self.respond(reader, writer)
+            except ServiceError as e:
+                status, payload = e.status, {"error": e.args[0]}
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            if payload is not None:
+                await send_json(writer, status, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, reader, writer) -> tuple[int, dict]:
+        method, path, query, headers, body = await read_request(reader)
+        parts = path.strip("/").split("/")
+        if parts == ["jobs"]:
+            if method == "GET":
+                return 200, {"jobs": [job.to_dict(False) for job in self.jobs.values()]}
+            if method == "POST":
+                # parsed off the event loop, large instances take a while
+                instance, options = await asyncio.get_running_loop().run_in_executor(
+                    None, read_job, body, headers.get("content-type", ""), query
+                )
+                job = self.submit(instance, self.job_config(**options))
+                return 202, job.to_dict()
+            raise ServiceError(405, f"{method} not allowed on {path}")
+        if parts[0] != "jobs" or len(parts) not in (2, 3):
+            raise ServiceError(404, f"no such path: {path}")
+        job = self.jobs.get(parts[1])
+        if job is None:
+            raise ServiceError(404, f"no such job: {parts[1]}")
+        if len(parts) == 2 and method == "GET":
+            return 200, job.to_dict()
+        if len(parts) == 2 and method == "DELETE":
+            self.cancel(job)
+            return 200, job.to_dict()
+        if parts[2:] == ["events"] and method == "GET":
+            await self.stream(job, writer)
+            return 200, None
+        raise ServiceError(405, f"{method} not allowed on {path}")
+
+    async def stream(self, job: Job, writer: asyncio.StreamWriter):
+        """Writes the state changes and incumbents of the job as JSON lines
+        until it ends, then the ended job without its result."""
+        writer.write(response_head(200, "application/x-ndjson") + b"\r\n")
+        sent, state = 0, None
+        while True:
+            changed = job.changed
+            lines = []
+            if job.state != state:
+                state = job.state
+                lines.append({"event": "state", "state": state})
+            lines += [{"event": "incumbent", **u} for u in job.updates[sent:]]
+            sent = len(job.updates)
+            if job.ended:
+                lines.append({"event": "end", **job.to_dict(False)})
+            writer.write(b"".join(json.dumps(line).encode() + b"\n" for line in lines))
+            await writer.drain()
+            if job.ended:
+                return
+            await changed.wait()
+
+    def close(self):
+        for job in self.jobs.values():
+            job.cancelled.set()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple:
+    """Reads an HTTP/1.1 request: method, path, query, headers and body."""
+    try:
+        method, target, _ = (await reader.readline()).decode("latin-1").split()
+    except ValueError:
+        raise ServiceError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if not line.strip():
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ServiceError(400, "invalid Content-Length")
+    if length > MAX_BODY:
+        raise ServiceError(413, f"body over {MAX_BODY} bytes")
+    body = await reader.readexactly(length)
+    url = urlsplit(target)
+    return method.upper(), url.path, dict(parse_qsl(url.query)), headers, body
+
+
+def response_head(status: int, content_type: str) -> bytes:
+    return (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: {content_type}\r\nConnection: close\r\n"
+    ).encode()
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: dict):
+    body = json.dumps(payload).encode()
+    head = response_head(status, "application/json")
+    writer.write(head + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+async def serve(service: Service, host: str = HOST, port: int = PORT):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(
+        f"Serving on http://{host}:{port}, {service.workers} jobs at a time "
+        f"with {service.search_workers} workers, time limit {service.max_time}s"
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def run_service(
+    host: str = HOST,
+    port: int = PORT,
+    workers: int = None,
+    max_time: float = MAX_TIME,
+    max_queue: int = MAX_QUEUE,
+):
+    service = Service(workers, max_time or MAX_TIME, max_queue or MAX_QUEUE)
+    try:
+        asyncio.run(serve(service, host, port))
+    except KeyboardInterrupt:
+        print("Service stopped")
+    finally:
+        service.close()
@@ -1,6 +1,43 @@
-from .solver import solve_scheduling, tiebreaker
+"""
+Names are imported from their module on first access, so that importing the
+package, for the constants or the preprocessing alone, does not load OR-Tools.
+"""
 
-__all__ = [
-    "solve_scheduling",
-    "tiebreaker",
-]
+from importlib import import_module
+
+_MODULES = {
+    "Bounds": "preprocess",
+    "DECOMPOSITIONS": "config",
+    "OBJECTIVES": "config",
+    "PRESETS": "config",
+    "PRIORITY_RULES": "config",
+    "STRATEGIES": "portfolio",
+    "Scheduler": "scheduler",
+    "SolverConfig": "config",
+    "Strategy": "portfolio",
+    "Telemetry": "telemetry",
+    "ValidationReport": "validate",
+    "build_precedence_graph": "precedence",
+    "compute_bounds": "preprocess",
+    "get_config": "config",
+    "heuristic_schedule": "heuristic",
+    "solve_decomposed": "decompose",
+    "solve_portfolio": "portfolio",
+    "solve_scheduling": "solver",
+    "tiebreaker": "solver",
+    "validate_schedule": "validate",
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return __all__
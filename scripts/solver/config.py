@@ -0,0 +1,79 @@
+from dataclasses import dataclass, replace
+
+OBJECTIVES = ("makespan", "tardiness", "combined")
+PRIORITY_RULES = ("lft", "mts", "grpw")
+DECOMPOSITIONS = ("projects", "window")
+
+
+@dataclass
+class SolverConfig:
+    """CP-SAT search parameters, zero or None leaves the solver default.
+    collect and keep select what the SolutionCollector stores, tiebreak
+    encodes the start time tiebreaker in the objective, preprocess
+    tightens the domains with critical path bounds and drops the implied
+    precedence arcs, warm_start names the priority rule of a heuristic
+    schedule given to the solver as a hint.
+    objective is makespan, tardiness (total weighted) or combined, which
+    adds makespan_weight * makespan to the weighted tardiness.
+    decomposition selects a large neighbourhood search that frees about
+    neighbourhood jobs at a time, each sub-solve limited to iteration_time.
+    search_branching names a CP-SAT SearchBranching, redundant keeps the
+    implied precedence arcs and adds energy bounds on the makespan, and
+    portfolio races several such strategies in parallel."""
+
+    num_workers: int = 0
+    time_limit: float = None
+    relative_gap: float = None
+    random_seed: int = None
+    stop_after_first_solution: bool = False
+    log_search: bool = False
+    collect: str = "best"
+    keep: int = 1
+    tiebreak: str = None
+    preprocess: bool = True
+    warm_start: str = None
+    passes: int = 1
+    objective: str = "makespan"
+    makespan_weight: int = 1
+    decomposition: str = None
+    neighbourhood: int = 1000
+    iteration_time: float = 10.0
+    search_branching: str = None
+    redundant: bool = False
+    portfolio: bool = False
+
+    def apply(self, solver):
+        from ortools.sat.sat_parameters_pb2 import SatParameters
+
+        parameters = solver.parameters
+        parameters.num_workers = self.num_workers
+        if self.time_limit:
+            parameters.max_time_in_seconds = self.time_limit
+        if self.relative_gap is not None:
+            parameters.relative_gap_limit = self.relative_gap
+        if self.random_seed is not None:
+            parameters.random_seed = self.random_seed
+        parameters.stop_after_first_solution = self.stop_after_first_solution
+        parameters.log_search_progress = self.log_search
+        if self.search_branching:
+            if self.search_branching not in SatParameters.SearchBranching.keys():
+                raise ValueError(f"unknown search branching: {self.search_branching}")
+            # the enum of the parameters' own type, the proto wrapper of
+            # recent OR-Tools rejects the int of the pb2 module
+            parameters.search_branching = getattr(
+                type(parameters), self.search_branching
+            )
+
+
+PRESETS = {
+    "fast": SolverConfig(time_limit=10, stop_after_first_solution=True),
+    "balanced": SolverConfig(time_limit=60, relative_gap=0.01),
+    "optimal": SolverConfig(),
+}
+
+
+def get_config(preset: str = None, **overrides) -> SolverConfig:
+    if preset is not None and preset not in PRESETS:
+        raise ValueError(f"unknown preset: {preset}")
+    config = PRESETS[preset] if preset else SolverConfig()
+    return replace(config, **{k: v for k, v in overrides.items() if v is not None})
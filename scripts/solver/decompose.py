@@ -0,0 +1,274 @@
+"""
+Large neighbourhood search for instances too large for a single model:
+    starting from a serial schedule, a neighbourhood of jobs is freed and
+    re-optimized by CP-SAT while every other job stays fixed, the new
+    schedule is kept when its objective is not worse.
+
+Neighbourhoods:
+    - projects: a random subset of whole projects
+    - window: the jobs of a time window, rolling through the schedule
+
+Fixed jobs enter the sub-model as constants: the ends of their
+predecessors and starts of their successors bound the free jobs, their
+per-period usage becomes fixed intervals and their total usage is taken
+off the nonrenewable capacities.
+"""
+
+import time
+from dataclasses import replace
+
+import numpy as np
+from ortools.sat.python import cp_model
+from structs import Instance
+
+from .config import DECOMPOSITIONS, OBJECTIVES, SolverConfig
+from .heuristic import heuristic_schedule
+from .preprocess import Bounds, compute_bounds
+from .solver import add_objective, create_job_for_project, solve_scheduling
+
+
+def schedule_objective(
+    instance: Instance, starts: np.ndarray, modes: np.ndarray, config: SolverConfig
+) -> int:
+    """Evaluates the configured objective of a complete schedule."""
+    ends = starts + instance.mode_durations[instance.mode_ptr[:-1] + modes]
+    project_ends = np.maximum.reduceat(ends, instance.project_ptr[:-1])
+    makespan = int(project_ends.max(initial=0))
+    if config.objective == "makespan":
+        return makespan
+    late = np.maximum(project_ends - instance.due_date, 0)
+    tardiness = int((late * instance.tardcost).sum())
+    if config.objective == "combined":
+        return tardiness + config.makespan_weight * makespan
+    return tardiness
+
+
+def project_neighbourhood(instance: Instance, rng, size: int) -> np.ndarray:
+    """Frees random whole projects, at least one, up to size jobs in total."""
+    order = rng.permutation(instance.project_count)
+    counts = np.cumsum(np.diff(instance.project_ptr)[order])
+    chosen = order[: max(1, int(np.searchsorted(counts, size, side="right")))]
+    return np.isin(instance.job_project, chosen)
+
+
+def window_neighbourhood(
+    starts: np.ndarray, position: int, size: int
+) -> tuple[np.ndarray, int]:
+    """Frees the size jobs starting from position in start time order and
+    returns the position of the next window, which overlaps half of this one."""
+    order = np.argsort(starts, kind="stable")
+    free = np.zeros(len(starts), dtype=bool)
+    free[order[position : position + size]] = True
+    position += max(size // 2, 1)
+    return free, 0 if position + size // 2 >= len(starts) else position
+
+
+def fixed_usage(instance: Instance, starts, ends, selected, fixed, length):
+    """Per-period usage profile of the fixed jobs built from difference arrays."""
+    per_period = np.flatnonzero(instance.per_period)
+    demands = instance.mode_demands[selected[fixed]][:, per_period].astype(np.int64)
+    starts, ends = np.minimum(starts[fixed], length), np.minimum(ends[fixed], length)
+    diff = np.zeros((len(per_period), length + 1), dtype=np.int64)
+    for r in range(len(per_period)):
+        np.add.at(diff[r], starts, demands[:, r])
+        np.add.at(diff[r], ends, -demands[:, r])
+    return np.cumsum(diff[:, :length], axis=1)
+
+
+def solve_neighbourhood(
+    instance: Instance,
+    starts: np.ndarray,
+    modes: np.ndarray,
+    free: np.ndarray,
+    horizon: int,
+    config: SolverConfig,
+    time_limit: float,
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """Re-optimizes the free jobs around the fixed ones, hinted with the
+    current schedule, returning the new start times and modes or None."""
+    selected = instance.mode_ptr[:-1] + modes
+    ends = starts + instance.mode_durations[selected]
+    jobs = np.flatnonzero(free)
+    local = np.full(instance.job_count, -1, dtype=np.int64)
+    local[jobs] = np.arange(len(jobs))
+
+    # fixed neighbours bound the free jobs, free jobs never end after the schedule
+    sources, targets = instance.arcs()
+    start_min = instance.rel_date[instance.job_project].astype(np.int64)
+    end_max = np.full(instance.job_count, int(ends.max(initial=0)), dtype=np.int64)
+    into = free[targets] & ~free[sources]
+    np.maximum.at(start_min, targets[into], ends[sources[into]])
+    out_of = free[sources] & ~free[targets]
+    np.minimum.at(end_max, sources[out_of], starts[targets[out_of]])
+    inner = free[sources] & free[targets]
+    horizon = max(horizon, int(end_max.max(initial=0)))
+
+    model = cp_model.CpModel()
+    pronr = instance.pronr[instance.job_project].tolist()
+    mode_ptr = instance.mode_ptr.tolist()
+    mode_durations = instance.mode_durations.tolist()
+    min_durations = instance.min_durations.tolist()
+    job_starts, job_ends, intervals, presences, mode_index = [], [], [], [], []
+    for j in jobs.tolist():
+        durations = mode_durations[mode_ptr[j] : mode_ptr[j + 1]]
+        start, end, job_intervals, literals = create_job_for_project(
+            model,
+            pronr[j],
+            int(instance.jobnr[j]),
+            durations,
+            int(start_min[j]),
+            int(end_max[j]) - min_durations[j],
+            int(end_max[j]),
+        )
+        job_starts.append(start)
+        job_ends.append(end)
+        intervals.extend(job_intervals)
+        presences.extend(literals)
+        mode_index.extend(range(mode_ptr[j], mode_ptr[j + 1]))
+        model.AddHint(start, int(starts[j]))
+        for m, literal in enumerate(literals):
+            if literal is not None:
+                model.AddHint(literal, int(m == modes[j]))
+
+    for job, successor in zip(
+        local[sources[inner]].tolist(), local[targets[inner]].tolist()
+    ):
+        model.Add(job_starts[successor] >= job_ends[job])
+
+    fixed = ~free
+    lo = int(start_min[jobs].min(initial=0))
+    hi = int(end_max[jobs].max(initial=0))
+    usage = fixed_usage(instance, starts, ends, selected, fixed, hi)
+    mode_demands = instance.mode_demands[mode_index]
+    for r, p in enumerate(np.flatnonzero(instance.per_period).tolist()):
+        # constant stretches of the fixed usage become fixed intervals
+        profile = usage[r, lo:hi]
+        changes = np.flatnonzero(np.diff(profile)) + 1
+        edges = np.concatenate(([0], changes, [len(profile)]))
+        busy = [
+            (lo + int(a), int(b - a), int(profile[a]))
+            for a, b in zip(edges[:-1].tolist(), edges[1:].tolist())
+            if profile[a] > 0
+        ]
+        demanding = np.flatnonzero(mode_demands[:, p] > 0).tolist()
+        model.AddCumulative(
+            [intervals[m] for m in demanding]
+            + [model.NewFixedSizeIntervalVar(a, size, "") for a, size, _ in busy],
+            mode_demands[demanding, p].tolist() + [d for _, _, d in busy],
+            instance.resources[p].resavail,
+        )
+
+    for p in np.flatnonzero(instance.per_total).tolist():
+        consumption = cp_model.LinearExpr.WeightedSum(
+            [1 if literal is None else literal for literal in presences],
+            mode_demands[:, p].tolist(),
+        )
+        used = int(instance.mode_demands[selected[fixed], p].sum())
+        model.Add(consumption <= instance.resources[p].resavail - used)
+
+    # projects without free jobs keep their current end as a constant
+    project_ends = np.maximum.reduceat(
+        np.where(free, 0, ends), instance.project_ptr[:-1]
+    ).tolist()
+    owner = instance.job_project[jobs]
+    for p in np.unique(owner).tolist():
+        end = model.NewIntVar(0, horizon, f"end_p{instance.pronr[p]}")
+        members = np.flatnonzero(owner == p).tolist()
+        model.AddMaxEquality(end, [job_ends[i] for i in members] + [project_ends[p]])
+        project_ends[p] = end
+    # ending the free jobs early breaks ties and compacts the schedule
+    objective, _ = add_objective(model, instance, project_ends, horizon, config)
+    weight = len(jobs) * horizon + 1
+    model.Minimize(objective * weight + cp_model.LinearExpr.Sum(job_ends))
+
+    solver = cp_model.CpSolver()
+    config.apply(solver)
+    solver.parameters.max_time_in_seconds = max(time_limit, 0.1)
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+
+    new_starts, new_modes = starts.copy(), modes.copy()
+    new_starts[jobs] = [solver.Value(v) for v in job_starts]
+    for m, literal in zip(mode_index, presences):
+        if literal is not None and solver.BooleanValue(literal):
+            job = int(instance.mode_job[m])
+            new_modes[job] = m - mode_ptr[job]
+    return new_starts, new_modes
+
+
+def first_schedule(
+    instance: Instance, config: SolverConfig, bounds: Bounds, time_limit: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the first solution of the full model, the start when the
+    serial scheme finds no modes that fit the nonrenewable capacities.
+    Raises a ValueError if there is none within time_limit."""
+    config = replace(
+        config,
+        decomposition=None,
+        warm_start=None,
+        tiebreak=None,
+        collect="trace",
+        stop_after_first_solution=True,
+        time_limit=time_limit,
+    )
+    result = solve_scheduling(instance, config=config, bounds=bounds)
+    if not result.found:
+        raise ValueError("no schedule found to start the decomposition from")
+    return result.starts, result.modes
+
+
+def solve_decomposed(
+    instance: Instance, config: SolverConfig = None, bounds: Bounds = None
+) -> tuple[np.ndarray, np.ndarray, int, list[tuple[float, int]]]:
+    """Improves a serial schedule by large neighbourhood search within
+    config.time_limit, returning the start times, modes and objective of
+    the best schedule and the (seconds, objective) trajectory."""
+    config = config or SolverConfig()
+    if config.decomposition not in DECOMPOSITIONS:
+        raise ValueError(f"unknown decomposition: {config.decomposition}")
+    if config.objective not in OBJECTIVES:
+        raise ValueError(f"unknown objective: {config.objective}")
+    begin = time.perf_counter()
+    budget = config.time_limit or 60.0
+    bounds = bounds or compute_bounds(instance)
+    rng = np.random.default_rng(config.random_seed)
+
+    schedule = heuristic_schedule(
+        instance, config.warm_start or "lft", config.passes, config.random_seed, bounds
+    )
+    if schedule is None:
+        starts, modes = first_schedule(instance, config, bounds, budget)
+    else:
+        starts, modes, _ = schedule
+    objective = schedule_objective(instance, starts, modes, config)
+    trajectory = [(time.perf_counter() - begin, objective)]
+    position = 0
+    while True:
+        remaining = budget - (time.perf_counter() - begin)
+        if remaining <= 0.1:
+            break
+        if config.decomposition == "projects":
+            free = project_neighbourhood(instance, rng, config.neighbourhood)
+        else:
+            free, position = window_neighbourhood(
+                starts, position, config.neighbourhood
+            )
+        result = solve_neighbourhood(
+            instance,
+            starts,
+            modes,
+            free,
+            instance.horizon,
+            config,
+            min(config.iteration_time, remaining),
+        )
+        if result is None:
+            continue
+        value = schedule_objective(instance, *result, config)
+        if value <= objective:
+            starts, modes = result
+            if value < objective:
+                trajectory.append((time.perf_counter() - begin, value))
+            objective = value
+    return starts, modes, objective, trajectory
@@ -0,0 +1,253 @@
+"""
+Serial schedule generation scheme (SSGS):
+    jobs are taken one at a time, the eligible job (all predecessors
+    scheduled) with the best priority is started at the earliest time
+    that respects its predecessors and the per-period resource profile.
+
+Priority rules:
+    - lft: latest finish time first
+    - mts: most total successors first
+    - grpw: greatest rank positional weight first
+      (own duration plus the durations of the immediate successors)
+
+Randomized passes perturb the rule priorities and keep the best schedule.
+Jobs with several modes run in their shortest mode that fits the capacities.
+When greedy switches cannot fit the nonrenewable capacities, a CP-SAT model
+of the mode choices alone picks the modes.
+"""
+
+import heapq
+
+import numpy as np
+from ortools.sat.python import cp_model
+from structs import Instance
+
+from .preprocess import Bounds, compute_bounds, topological_levels
+
+# seconds the exact mode search may take when the greedy repair fails
+MODE_SEARCH_TIME = 5.0
+
+
+def total_successors(instance: Instance) -> np.ndarray:
+    """Counts the transitive successors of every job with bitsets indexed
+    within its project, arcs never cross projects, so memory grows with the
+    squared jobs of each project rather than of the whole instance."""
+    n = instance.job_count
+    sources, targets = instance.arcs()
+    levels, level_arcs, order = topological_levels(n, sources, targets)
+    sources, targets = sources[order], targets[order]
+    bits = targets - instance.project_ptr[instance.job_project[targets]]
+
+    reach = [0] * n
+    for arcs in reversed(level_arcs):
+        for job, successor, bit in zip(
+            sources[arcs].tolist(), targets[arcs].tolist(), bits[arcs].tolist()
+        ):
+            reach[job] |= reach[successor] | (1 << bit)
+    return np.array([r.bit_count() for r in reach], dtype=np.int64)
+
+
+def get_priorities(instance: Instance, rule: str, bounds: Bounds) -> np.ndarray:
+    """Returns the priority of every job, lower values are scheduled first."""
+    durations = instance.min_durations.astype(np.int64)
+    if rule == "lft":
+        return bounds.latest_finish.astype(np.float64)
+    if rule == "mts":
+        return -total_successors(instance).astype(np.float64)
+    if rule == "grpw":
+        sources, targets = instance.arcs()
+        weight = durations + np.bincount(
+            sources, weights=durations[targets], minlength=instance.job_count
+        ).astype(np.int64)
+        return -weight.astype(np.float64)
+    raise ValueError(f"unknown priority rule: {rule}")
+
+
+def select_modes(instance: Instance) -> np.ndarray | None:
+    """Picks the shortest mode of every job whose per-period demands fit the
+    capacities, the least total demand breaks ties. Modes are then switched
+    until the total demands fit the nonrenewable capacities, or searched for
+    if that fails. Returns None if no modes fit."""
+    capacity, per_period = instance.capacity, instance.per_period
+    demands = instance.mode_demands.astype(np.int64)
+    fits = (demands[:, per_period] <= capacity[per_period]).all(axis=1)
+    order = np.lexsort(
+        (demands.sum(axis=1), instance.mode_durations, ~fits, instance.mode_job)
+    )
+    modes = order[instance.mode_ptr[:-1]] - instance.mode_ptr[:-1]
+    if instance.per_total.any():
+        repaired = repair_modes(instance, modes, fits)
+        modes = search_modes(instance, fits) if repaired is None else repaired
+    return modes
+
+
+def repair_modes(
+    instance: Instance, modes: np.ndarray, fits: np.ndarray
+) -> np.ndarray | None:
+    """Greedily switches jobs to the modes that save the most overused
+    nonrenewable demand per period of extra duration. Returns None when no
+    switch helps, which does not prove that no modes fit."""
+    per_total = instance.per_total
+    budget = instance.capacity[per_total]
+    demands = instance.mode_demands[:, per_total].astype(np.int64)
+    durations = instance.mode_durations.astype(np.int64)
+    mode_job, first = instance.mode_job, instance.mode_ptr[:-1]
+
+    for _ in range(len(durations)):
+        selected = first + modes
+        excess = demands[selected].sum(axis=0) - budget
+        if (excess <= 0).all():
+            return modes
+        over = excess > 0
+        saving = demands[selected][mode_job] - demands
+        gain = np.minimum(saving[:, over], excess[over]).clip(min=0).sum(axis=1)
+        overflow = (saving[:, ~over] + excess[~over] > 0).any(axis=1)
+        delay = (durations - durations[selected][mode_job]).clip(min=0)
+        score = np.where(fits & ~overflow & (gain > 0), gain / (1 + delay), 0)
+        if not score.any():
+            return None
+
+        # switch the best mode of several jobs until the excess is covered
+        order = np.argsort(-score, kind="stable")
+        order = order[score[order] > 0]
+        _, best = np.unique(mode_job[order], return_index=True)
+        best = order[np.sort(best)]
+        covered = np.cumsum(gain[best])
+        best = best[: int(np.searchsorted(covered, excess[over].sum())) + 1]
+        modes[mode_job[best]] = best - first[mode_job[best]]
+    return None
+
+
+def search_modes(instance: Instance, fits: np.ndarray) -> np.ndarray | None:
+    """Picks one mode per job among those that fit the per-period capacities
+    so that the total demands fit the nonrenewable capacities, the least
+    total duration first. Returns None if there are none or none is found
+    within MODE_SEARCH_TIME."""
+    mode_job, first = instance.mode_job, instance.mode_ptr[:-1]
+    if np.bincount(mode_job[fits], minlength=instance.job_count).min(initial=1) == 0:
+        return None
+    candidates = np.flatnonzero(fits)
+    model = cp_model.CpModel()
+    chosen = [model.NewBoolVar(f"mode_{m}") for m in candidates.tolist()]
+    for job in np.split(
+        np.arange(len(candidates)), np.flatnonzero(np.diff(mode_job[candidates])) + 1
+    ):
+        model.AddExactlyOne([chosen[i] for i in job.tolist()])
+    demands = instance.mode_demands[candidates].astype(np.int64)
+    for r in np.flatnonzero(instance.per_total).tolist():
+        model.Add(
+            cp_model.LinearExpr.WeightedSum(chosen, demands[:, r].tolist())
+            <= int(instance.capacity[r])
+        )
+    model.Minimize(
+        cp_model.LinearExpr.WeightedSum(
+            chosen, instance.mode_durations[candidates].tolist()
+        )
+    )
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = MODE_SEARCH_TIME
+    if solver.Solve(model) not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    selected = candidates[np.array([solver.BooleanValue(x) for x in chosen], bool)]
+    modes = np.zeros(instance.job_count, dtype=np.int64)
+    modes[mode_job[selected]] = selected - first[mode_job[selected]]
+    return modes
+
+
+def earliest_feasible(usage, limits, duration, start) -> int:
+    """Finds the first t >= start where usage[:, t:t + duration] stays within
+    limits, looking for a long enough gap between the blocked time steps of a
+    window that widens until one is found."""
+    window = duration
+    while True:
+        end = min(start + window, usage.shape[1])
+        blocked = (usage[:, start:end] > limits).any(0).nonzero()[0]
+        if len(blocked) == 0 or blocked[0] >= duration:
+            return start
+        gaps = ((blocked[1:] - blocked[:-1]) > duration).nonzero()[0]
+        if len(gaps):
+            return start + int(blocked[gaps[0]]) + 1
+        free = start + int(blocked[-1]) + 1
+        if free + duration <= end:
+            return free
+        if end == usage.shape[1]:
+            raise RuntimeError("resource profile is too short for the schedule")
+        start, window = free, 4 * window + 64
+
+
+def serial_sgs(
+    instance: Instance, priorities: np.ndarray, release: np.ndarray = None
+) -> np.ndarray:
+    """Builds a schedule with the serial scheme, returning the start times."""
+    n = instance.job_count
+    durations = instance.durations.tolist()
+    per_period = instance.per_period
+    demands = instance.demands[:, per_period].astype(np.int64)
+    capacity = instance.capacity[per_period]
+    if (demands > capacity).any():
+        raise ValueError("a job demands more than a resource's capacity")
+
+    sources, targets = instance.arcs()
+    order = np.argsort(sources, kind="stable")
+    targets = targets[order].tolist()
+    ptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n)))).tolist()
+    predecessors = np.bincount(targets, minlength=n).tolist()
+
+    limits = (capacity - demands)[:, :, None]
+    needs = (demands > 0).any(axis=1).tolist()
+    earliest = [0] * n if release is None else release.tolist()
+    length = int(sum(durations)) + max(earliest, default=0) + 1
+    usage = np.zeros((len(capacity), length), dtype=np.int64)
+    starts = np.zeros(n, dtype=np.int64)
+
+    eligible = [(priorities[j], j) for j in range(n) if predecessors[j] == 0]
+    heapq.heapify(eligible)
+    while eligible:
+        _, job = heapq.heappop(eligible)
+        duration, start = durations[job], earliest[job]
+        if duration and needs[job]:
+            start = earliest_feasible(usage, limits[job], duration, start)
+            usage[:, start : start + duration] += demands[job, :, None]
+        starts[job] = start
+
+        finish = start + duration
+        for successor in targets[ptr[job] : ptr[job + 1]]:
+            earliest[successor] = max(earliest[successor], finish)
+            predecessors[successor] -= 1
+            if predecessors[successor] == 0:
+                heapq.heappush(eligible, (priorities[successor], successor))
+
+    return starts
+
+
+def heuristic_schedule(
+    instance: Instance,
+    rule: str = "lft",
+    passes: int = 1,
+    seed: int = None,
+    bounds: Bounds = None,
+) -> tuple[np.ndarray, np.ndarray, int] | None:
+    """Runs the rule once and passes - 1 randomized times, returning the
+    start times, modes and makespan of the best schedule, or None if no
+    modes fit the nonrenewable capacities."""
+    bounds = bounds or compute_bounds(instance)
+    priorities = get_priorities(instance, rule, bounds)
+    rng = np.random.default_rng(seed)
+    spread = max(float(priorities.max(initial=0) - priorities.min(initial=0)), 1.0)
+    modes = select_modes(instance)
+    if modes is None:
+        return None
+    selected = instance.with_modes(modes) if instance.multi_mode else instance
+    durations = selected.durations.astype(np.int64)
+    release = instance.rel_date[instance.job_project]
+
+    best, best_makespan = None, None
+    for i in range(max(passes, 1)):
+        keys = priorities
+        if i > 0:
+            keys = priorities + rng.random(instance.job_count) * spread * 0.25
+        starts = serial_sgs(selected, keys, release)
+        makespan = int((starts + durations).max(initial=0))
+        if best is None or makespan < best_makespan:
+            best, best_makespan = starts, makespan
+    return best, modes, best_makespan
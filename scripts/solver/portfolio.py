@@ -0,0 +1,270 @@
+"""
+Portfolio solving: several strategies race on the same instance, one
+process each, and the best result within the time budget wins. Strategies
+are SolverConfig overrides differing in search branching, in the heuristic
+hint and in the formulation (redundant constraints).
+
+Strategies share their incumbent objective through shared memory. CP-SAT
+cannot take a solution mid-search, so the shared value is used to stop the
+strategies that can no longer win: those whose bound reaches the best
+objective found by any strategy, and all of them once one proves optimality.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+from structs import Instance
+
+from .config import SolverConfig
+from .heuristic import heuristic_schedule
+from .preprocess import Bounds, compute_bounds
+from .solver import solve_scheduling
+from .telemetry import Telemetry
+
+# seconds between checks of the shared incumbent
+POLL_INTERVAL = 0.1
+
+
+@dataclass
+class Strategy:
+    name: str
+    overrides: dict = field(default_factory=dict)
+
+    def config(self, config: SolverConfig) -> SolverConfig:
+        return replace(config, portfolio=False, **self.overrides)
+
+
+STRATEGIES = (
+    Strategy("hinted", {"warm_start": "lft"}),
+    Strategy("automatic", {"warm_start": None}),
+    Strategy("fixed", {"warm_start": "lft", "search_branching": "FIXED_SEARCH"}),
+    Strategy("pseudo_cost", {"search_branching": "PSEUDO_COST_SEARCH"}),
+    Strategy("redundant", {"warm_start": "lft", "redundant": True}),
+)
+
+
+class Incumbent:
+    """Best objective of all strategies and whether it is proven optimal,
+    in shared memory so every process of the pool sees it."""
+
+    def __init__(self, objective=None, optimal=None):
+        if objective is None:
+            objective = multiprocessing.Value("d", float("inf"))
+        if optimal is None:
+            optimal = multiprocessing.Value("b", False)
+        self.objective, self.optimal = objective, optimal
+
+    def offer(self, objective: float):
+        with self.objective.get_lock():
+            if objective < self.objective.value:
+                self.objective.value = objective
+
+    def prove(self):
+        self.optimal.value = True
+
+    def beaten(self, bound: float) -> bool:
+        """Whether a search with this bound can no longer improve on it."""
+        return bool(self.optimal.value) or self.objective.value <= bound
+
+    @contextmanager
+    def watch(self, solver, collector):
+        """Publishes the solutions of a running solve and stops it once
+        another strategy has made it pointless."""
+        bound = [-float("inf")]
+        solver.best_bound_callback = lambda value: bound.__setitem__(0, value)
+        done = threading.Event()
+
+        def poll():
+            while not done.wait(POLL_INTERVAL):
+                # as solved, the trace may hold the primary objective only
+                if collector.incumbent:
+                    objective, best_bound = collector.incumbent
+                    self.offer(objective)
+                    bound[0] = max(bound[0], best_bound)
+                if self.beaten(bound[0]):
+                    solver.StopSearch()
+                    return
+
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+            if collector.incumbent:
+                self.offer(collector.incumbent[0])
+
+
+@dataclass
+class PortfolioResult:
+    strategy: str
+    status: str
+    objective: float
+    bound: float
+    starts: np.ndarray
+    modes: np.ndarray
+    results: dict
+
+    def __str__(self):
+        rows = [
+            f"{name:>12} | {r['status']:>10} | objective {r['objective']}"
+            f" | bound {r['bound']} | {r['wall_time']:.2f}s"
+            + (f" | {r['error']}" if "error" in r else "")
+            for name, r in self.results.items()
+        ]
+        return "\n".join(rows + [f"Winning strategy: {self.strategy}"])
+
+
+_incumbent = None
+
+
+def init_worker(objective, optimal):
+    global _incumbent
+    _incumbent = Incumbent(objective, optimal)
+
+
+def run_strategy(
+    instance: Instance,
+    strategy: Strategy,
+    config: SolverConfig,
+    bounds: Bounds,
+    hint: tuple[np.ndarray, np.ndarray],
+) -> dict:
+    start = time.perf_counter()
+    config = strategy.config(config)
+    if hint is None:
+        config = replace(config, warm_start=None)
+    telemetry = Telemetry()
+    solved = solve_scheduling(
+        instance,
+        config=config,
+        bounds=bounds,
+        hint=hint if config.warm_start else None,
+        telemetry=telemetry,
+        incumbent=_incumbent,
+    )
+    if solved.status == "OPTIMAL":
+        _incumbent.prove()
+    result = {
+        "status": solved.status,
+        "objective": solved.objective,
+        "bound": solved.bound,
+        "starts": solved.starts,
+        "modes": solved.modes,
+    }
+    result["wall_time"] = time.perf_counter() - start
+    result["phases"] = telemetry.to_dict()["phases"]
+    return result
+
+
+def strategy_result(future) -> dict:
+    """The result of a strategy, an ERROR status without a schedule if it
+    raised, so that one failing strategy does not abort the race."""
+    try:
+        return future.result()
+    except Exception as e:
+        return {
+            "status": "ERROR",
+            "objective": None,
+            "bound": -float("inf"),
+            "starts": None,
+            "modes": None,
+            "wall_time": 0.0,
+            "phases": {},
+            "error": f"{type(e).__name__}: {e}",
+        }
+
+
+def share_workers(config: SolverConfig, strategies: int) -> int:
+    """CP-SAT workers of each strategy, at least one."""
+    workers = config.num_workers or os.cpu_count() or 1
+    return max(1, workers // strategies)
+
+
+def solve_portfolio(
+    instance: Instance,
+    config: SolverConfig = None,
+    bounds: Bounds = None,
+    strategies: tuple[Strategy] = STRATEGIES,
+    telemetry: Telemetry = None,
+) -> PortfolioResult:
+    """Races the strategies and returns the best result. config.num_workers
+    is the total of CP-SAT workers, the number of CPUs if not set, shared
+    among the strategies with at least one each. The bounds and the
+    heuristic hint are computed once for all strategies."""
+    config = config or SolverConfig()
+    telemetry = telemetry or Telemetry()
+    if bounds is None and config.preprocess:
+        with telemetry.phase("preprocess"):
+            bounds = compute_bounds(instance)
+    hint = None
+    if any(strategy.config(config).warm_start for strategy in strategies):
+        with telemetry.phase("heuristic"):
+            schedule = heuristic_schedule(
+                instance,
+                config.warm_start or "lft",
+                config.passes,
+                config.random_seed,
+                bounds,
+            )
+        # without modes that fit the nonrenewable capacities, all run unhinted
+        hint = None if schedule is None else schedule[:2]
+    config = replace(config, num_workers=share_workers(config, len(strategies)))
+
+    incumbent = Incumbent()
+    with telemetry.phase("portfolio"), ProcessPoolExecutor(
+        len(strategies),
+        initializer=init_worker,
+        initargs=(incumbent.objective, incumbent.optimal),
+    ) as pool:
+        futures = {
+            strategy.name: pool.submit(
+                run_strategy, instance, strategy, config, bounds, hint
+            )
+            for strategy in strategies
+        }
+        results = {name: strategy_result(future) for name, future in futures.items()}
+
+    # proven optimal first, then the best objective, then the fastest
+    def rank(name):
+        r = results[name]
+        objective = float("inf") if r["objective"] is None else r["objective"]
+        return (r["status"] != "OPTIMAL", objective, r["wall_time"])
+
+    winner = min(results, key=rank)
+    best = results[winner]
+    # every strategy's bound holds, together they may prove the winner optimal
+    bound = max(r["bound"] for r in results.values())
+    status = best["status"]
+    if best["objective"] is not None and best["objective"] <= bound:
+        status = "OPTIMAL"
+    telemetry.stats = {
+        "strategy": winner,
+        "status": status,
+        "objective": best["objective"],
+        "best_bound": bound,
+        "strategies": {
+            name: {
+                k: r[k]
+                for k in ("status", "objective", "bound", "wall_time", "error")
+                if k in r
+            }
+            for name, r in results.items()
+        },
+    }
+    return PortfolioResult(
+        winner,
+        status,
+        best["objective"],
+        bound,
+        best["starts"],
+        best["modes"],
+        results,
+    )
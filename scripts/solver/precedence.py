@@ -0,0 +1,215 @@
+"""
+Precedence graph of an instance, checked and reduced before it reaches the model:
+    - successors that name no job of their project are rejected
+    - a cycle is rejected, the model could never be feasible
+    - transitive reduction drops the arcs (u, v) implied by a longer path
+      from u to v, which only add work to presolve and propagation
+Reachability is kept as bitsets, one uint64 word per 64 target jobs, and is
+computed over blocks of target jobs to bound memory. Arcs never cross
+projects, so a block of jobs is only reached from the projects it spans.
+The work grows with arcs * jobs / 64 per project, past MAX_WORK the arcs
+are only checked and kept as they are.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from structs import Instance
+
+from .preprocess import topological_levels
+
+# uint64 words of reachability held at once, 32 MB
+BLOCK_WORDS = 1 << 22
+# small projects share a block up to this many jobs
+GROUP_JOBS = 1024
+# word operations above which the reduction is skipped, a few seconds
+MAX_WORK = 1 << 26
+# upper end of an unbounded linear constraint domain, as in cp_model
+INT_MAX = 2**63 - 1
+
+
+@dataclass
+class PrecedenceGraph:
+    sources: np.ndarray
+    targets: np.ndarray
+    removed: int = 0
+    reduced: bool = False
+
+    @property
+    def arc_count(self) -> int:
+        return len(self.sources)
+
+    def __str__(self):
+        if not self.reduced:
+            return f"Precedence arcs: {self.arc_count} (not reduced)"
+        total = self.arc_count + self.removed
+        share = self.removed / total if total else 0
+        return (
+            f"Precedence arcs: {total} -> {self.arc_count} "
+            f"({self.removed} implied arcs removed, {share:.1%})"
+        )
+
+
+def check_successors(instance: Instance):
+    """Raises a ValueError naming the first successor that is not a job of
+    its project."""
+    dangling = np.flatnonzero((instance.succ_idx < 0) & (instance.succ_jobnr != 0))
+    if len(dangling) == 0:
+        return
+    position = int(dangling[0])
+    j = int(np.searchsorted(instance.succ_ptr, position, side="right")) - 1
+    raise ValueError(
+        f"job {instance.jobnr[j]} of project {instance.pronr[instance.job_project[j]]}"
+        f" has unknown successor {instance.succ_jobnr[position]}"
+        f" ({len(dangling)} unknown successors in total)"
+    )
+
+
+def column_blocks(n: int, project_ptr: np.ndarray):
+    """Yields (row_lo, row_hi, col_lo, col_hi): the jobs of col_lo:col_hi can
+    only be reached from the jobs of row_lo:row_hi, the projects they span."""
+    ptr = project_ptr.tolist()
+    p = 0
+    while p < len(ptr) - 1:
+        q = p + 1
+        while q < len(ptr) - 1 and ptr[q + 1] - ptr[p] <= GROUP_JOBS:
+            q += 1
+        lo, hi = ptr[p], ptr[q]
+        # a project too large on its own is split into column blocks
+        width = max(64, BLOCK_WORDS // max(hi - lo, 1) * 64)
+        for col in range(lo, hi, width):
+            yield lo, hi, col, min(col + width, hi)
+        p = q
+
+
+def reduction_work(sources: np.ndarray, blocks: list[tuple]) -> int:
+    """Counts the reachability words the blocks sweep, sources sorted."""
+    work = 0
+    for row_lo, row_hi, col_lo, col_hi in blocks:
+        arcs = np.searchsorted(sources, row_hi) - np.searchsorted(sources, row_lo)
+        work += int(arcs) * -(-(col_hi - col_lo) // 64)
+    return work
+
+
+def group_starts(keys: np.ndarray) -> np.ndarray:
+    """Returns the first position of every run of equal keys."""
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+
+def implied_arcs(
+    reach: np.ndarray, sources: np.ndarray, targets: np.ndarray, offset: int
+) -> np.ndarray:
+    """Marks the arcs, grouped by source, whose target is reachable from
+    another successor. Jobs are rows of reach, offset is the row of bit 0."""
+    column = targets - offset
+    in_block = (column >= 0) & (column < reach.shape[1] * 64)
+    word = np.where(in_block, column // 64, 0)
+    bit = np.left_shift(np.uint64(1), (column % 64).astype(np.uint64))
+    bit[~in_block] = 0
+    arcs = np.arange(len(targets))
+    below = reach[targets]
+    below[arcs, word] &= ~bit
+    starts = group_starts(sources)
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(arcs))))
+    through = np.bitwise_or.reduceat(below, starts)
+    return (through[group, word] & bit) != 0
+
+
+def transitive_reduction(
+    n: int,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    project_ptr: np.ndarray = None,
+    max_work: int = None,
+) -> np.ndarray:
+    """Returns a mask of the arcs that are not implied by a longer path, or
+    None if that takes more than max_work. Raises a ValueError if the arcs
+    have a cycle."""
+    if project_ptr is None:
+        project_ptr = np.array([0, n])
+    levels, level_arcs, order = topological_levels(n, sources, targets)
+    # arcs sorted by source, the arcs leaving a level are runs of sources
+    s, t = sources[order].astype(np.int64), targets[order].astype(np.int64)
+    blocks = list(column_blocks(n, project_ptr))
+    if max_work is not None and reduction_work(s, blocks) > max_work:
+        return None
+    level_of = np.zeros(n, dtype=np.int64)
+    for level, jobs in enumerate(levels):
+        level_of[jobs] = level
+    runs = [group_starts(s[arcs]) for arcs in level_arcs]
+    redundant = np.zeros(len(s), dtype=bool)
+
+    for row_lo, row_hi, col_lo, col_hi in blocks:
+        inside = np.flatnonzero((s >= row_lo) & (s < row_hi))
+        if len(inside) == 0:
+            continue
+        # reach[u] has the bit of u and of every job of the block u reaches
+        columns = np.arange(col_hi - col_lo)
+        reach = np.zeros((row_hi - row_lo, -(-len(columns) // 64)), dtype=np.uint64)
+        reach[columns + col_lo - row_lo, columns // 64] = np.left_shift(
+            np.uint64(1), (columns % 64).astype(np.uint64)
+        )
+
+        # jobs of later levels than the block's cannot reach it
+        last = int(level_of[col_lo:col_hi].max())
+        for level in range(last, -1, -1):
+            arcs, starts = level_arcs[level], runs[level]
+            if len(arcs) == 0:
+                continue
+            if not (row_lo <= s[arcs[0]] and s[arcs[-1]] < row_hi):
+                keep = (s[arcs] >= row_lo) & (s[arcs] < row_hi)
+                arcs = arcs[keep]
+                if len(arcs) == 0:
+                    continue
+                starts = group_starts(s[arcs])
+            reach[s[arcs[starts]] - row_lo] |= np.bitwise_or.reduceat(
+                reach[t[arcs] - row_lo], starts
+            )
+
+        # (u, v) is implied when v is reachable from another successor of u,
+        # checked over chunks of whole sources to bound the gathered rows
+        bounds = np.unique(
+            np.searchsorted(s[inside], s[inside[:: len(reach)]]).tolist()
+            + [len(inside)]
+        )
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            chunk = inside[lo:hi]
+            redundant[chunk] |= implied_arcs(
+                reach, s[chunk] - row_lo, t[chunk] - row_lo, col_lo - row_lo
+            )
+
+    keep = np.ones(len(sources), dtype=bool)
+    keep[order[redundant]] = False
+    return keep
+
+
+def build_precedence_graph(instance: Instance, reduce: bool = True) -> PrecedenceGraph:
+    """Checks the successors and the absence of cycles, then removes the
+    implied arcs if reduce is set and the reduction is affordable."""
+    check_successors(instance)
+    sources, targets = instance.arcs()
+    if not reduce:
+        topological_levels(instance.job_count, sources, targets)
+        return PrecedenceGraph(sources, targets)
+    keep = transitive_reduction(
+        instance.job_count, sources, targets, instance.project_ptr, MAX_WORK
+    )
+    if keep is None:
+        return PrecedenceGraph(sources, targets)
+    return PrecedenceGraph(sources[keep], targets[keep], int((~keep).sum()), True)
+
+
+def emit_precedences(model, graph: PrecedenceGraph, job_start_vars, job_end_vars):
+    """Adds start[target] - end[source] >= 0 for every arc, writing the linear
+    constraints straight into the model proto."""
+    start_index = np.array([v.Index() for v in job_start_vars], dtype=np.int64)
+    end_index = np.array([v.Index() for v in job_end_vars], dtype=np.int64)
+    variables = np.column_stack(
+        (start_index[graph.targets], end_index[graph.sources])
+    ).tolist()
+    constraints = model.Proto().constraints
+    for pair in variables:
+        linear = constraints.add().linear
+        linear.vars.extend(pair)
+        linear.coeffs.extend((1, -1))
+        linear.domain.extend((0, INT_MAX))
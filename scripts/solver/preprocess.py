@@ -0,0 +1,128 @@
+"""
+Critical path preprocessing of the precedence network:
+    - forward pass: earliest start of each job, not before its project's
+      release date
+    - backward pass: latest start of each job that still ends by the horizon
+    - resource bound: total per-period work divided by the capacity
+These bound the start variable domains and the makespan. Jobs with several
+modes are counted with their shortest duration and least work.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from structs import Instance
+
+
+@dataclass
+class Bounds:
+    earliest_start: np.ndarray
+    latest_start: np.ndarray
+    latest_finish: np.ndarray
+    critical_path: int
+    resource_bound: int
+    horizon: int
+
+    @property
+    def lower_bound(self) -> int:
+        return max(self.critical_path, self.resource_bound)
+
+    @property
+    def feasible(self) -> bool:
+        return self.critical_path <= self.horizon
+
+    def domain_sizes(self) -> tuple[int, int]:
+        """Returns the summed start domain sizes before and after tightening."""
+        before = len(self.earliest_start) * (self.horizon + 1)
+        after = int((self.latest_start - self.earliest_start + 1).sum())
+        return before, after
+
+    def __str__(self):
+        before, after = self.domain_sizes()
+        reduction = 1 - after / before if before else 0
+        return (
+            f"Makespan lower bound: {self.lower_bound} "
+            f"(critical path {self.critical_path}, resources {self.resource_bound})\n"
+            f"Start domains: {before} -> {after} values ({reduction:.1%} reduction)"
+        )
+
+
+def csr_gather(ptr: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Returns the concatenated CSR positions ptr[r]:ptr[r + 1] of the given rows."""
+    counts = ptr[rows + 1] - ptr[rows]
+    total = int(counts.sum())
+    offsets = np.repeat(ptr[rows] - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+def topological_levels(
+    n: int, sources: np.ndarray, targets: np.ndarray
+) -> tuple[list[np.ndarray], list[np.ndarray], np.ndarray]:
+    """Splits the jobs into levels whose predecessors are all in earlier
+    levels, returning the levels, the arcs leaving each level (as positions
+    in the source sorted arc arrays) and the arc sort order."""
+    order = np.argsort(sources, kind="stable")
+    sources, targets = sources[order], targets[order]
+    ptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n))))
+    indegree = np.bincount(targets, minlength=n)
+
+    levels, level_arcs, visited = [], [], 0
+    frontier = np.flatnonzero(indegree == 0)
+    while len(frontier):
+        arcs = csr_gather(ptr, frontier)
+        levels.append(frontier)
+        level_arcs.append(arcs)
+        visited += len(frontier)
+        reached = targets[arcs]
+        np.subtract.at(indegree, reached, 1)
+        reached = np.unique(reached)
+        frontier = reached[indegree[reached] == 0]
+
+    if visited != n:
+        raise ValueError(f"precedence network has a cycle through {n - visited} jobs")
+    return levels, level_arcs, order
+
+
+def resource_bound(instance: Instance) -> int:
+    bound = 0
+    per_period = instance.per_period
+    for r, resource in enumerate(instance.resources):
+        if not per_period[r] or resource.resavail <= 0:
+            continue
+        work = instance.mode_durations.astype(np.int64) * instance.mode_demands[:, r]
+        if instance.multi_mode:
+            work = np.minimum.reduceat(work, instance.mode_ptr[:-1])
+        work = int(work.sum())
+        bound = max(bound, -(-work // resource.resavail))
+    return bound
+
+
+def compute_bounds(instance: Instance, horizon: int = None) -> Bounds:
+    horizon = instance.horizon if horizon is None else horizon
+    n = instance.job_count
+    durations = instance.min_durations.astype(np.int64)
+    sources, targets = instance.arcs()
+    levels, level_arcs, order = topological_levels(n, sources, targets)
+    sources, targets = sources[order], targets[order]
+
+    earliest = instance.rel_date[instance.job_project].astype(np.int64)
+    for arcs in level_arcs:
+        np.maximum.at(
+            earliest, targets[arcs], earliest[sources[arcs]] + durations[sources[arcs]]
+        )
+
+    # tail: duration of the longest chain starting with the job
+    tail = durations.copy()
+    longest = np.zeros(n, dtype=np.int64)
+    for level, arcs in zip(reversed(levels), reversed(level_arcs)):
+        np.maximum.at(longest, sources[arcs], tail[targets[arcs]])
+        tail[level] = durations[level] + longest[level]
+
+    return Bounds(
+        earliest,
+        horizon - tail,
+        horizon - tail + durations,
+        int((earliest + durations).max(initial=0)),
+        resource_bound(instance),
+        horizon,
+    )
@@ -0,0 +1,240 @@
+"""
+Incremental re-solving: the Scheduler keeps one CP-SAT model between solves
+and applies schedule changes to it in place:
+    - a changed duration patches the size of the job's interval
+    - a changed capacity patches the capacity of the resource's constraints
+    - added projects get new variables and precedences, only the resource
+      constraints and the objective are rebuilt
+A change that lengthens the schedule grows the horizon and widens the
+domains of the jobs that are not frozen. Every solve is hinted with the
+previous solution and jobs that already started can be frozen at their start
+time and mode. Start domains are not tightened by critical path bounds, which
+a change could invalidate.
+"""
+
+from dataclasses import replace
+
+import numpy as np
+from ortools.sat.python import cp_model
+from structs import Instance
+
+from .config import SolverConfig
+from .solver import (
+    SolutionCollector,
+    add_objective,
+    add_precedence_constraints,
+    add_project_ends,
+    add_resource_constraints,
+    create_job_variables,
+)
+
+
+class Scheduler:
+    def __init__(self, instance: Instance, config: SolverConfig = None):
+        self.instance = replace(
+            instance,
+            info=replace(instance.info),
+            resources=list(instance.resources),
+            durations=instance.durations.copy(),
+            mode_durations=instance.mode_durations.copy(),
+        )
+        self.config = config or SolverConfig()
+        self.model = cp_model.CpModel()
+        self.job_vars = create_job_variables(
+            self.model, self.instance, self.instance.horizon
+        )
+        add_precedence_constraints(
+            self.model, self.instance, self.job_vars.starts, self.job_vars.ends
+        )
+        self.resource_constraints = add_resource_constraints(
+            self.model,
+            self.instance,
+            self.job_vars.mode_intervals,
+            self.job_vars.presences,
+        )
+        self.project_ends = add_project_ends(
+            self.model, self.instance, self.job_vars.ends, self.instance.horizon
+        )
+        self.objective_constraints = range(0)
+        self.build_objective()
+        self.frozen = np.zeros(self.instance.job_count, dtype=bool)
+        self.solution = None
+        self.solver = None
+        self.collector = None
+
+    def job_index(self, pronr: int, jobnr: int) -> int:
+        instance = self.instance
+        match = np.flatnonzero(
+            (instance.pronr[instance.job_project] == pronr) & (instance.jobnr == jobnr)
+        )
+        if len(match) == 0:
+            raise ValueError(f"no job {jobnr} in project {pronr}")
+        if len(match) > 1:
+            raise ValueError(f"job {jobnr} of project {pronr} is not unique")
+        return int(match[0])
+
+    def clear_constraints(self, indices):
+        constraints = self.model.Proto().constraints
+        for i in indices:
+            # an empty constraint, the proto wrapper of OR-Tools has no Clear
+            constraints[i].copy_from(type(constraints[i])())
+
+    def build_objective(self):
+        """Replaces the makespan and tardiness constraints and the objective."""
+        self.clear_constraints(self.objective_constraints)
+        first = len(self.model.Proto().constraints)
+        add_objective(
+            self.model,
+            self.instance,
+            self.project_ends,
+            self.instance.horizon,
+            self.config,
+        )
+        self.objective_constraints = range(first, len(self.model.Proto().constraints))
+
+    def reset_domains(self, j: int):
+        """Widens the start and end domains of a job to its current durations,
+        a frozen job keeps its start."""
+        instance = self.instance
+        modes = instance.mode_durations[instance.mode_ptr[j] : instance.mode_ptr[j + 1]]
+        shortest, horizon = int(modes.min()), instance.horizon
+        start = self.job_vars.starts[j]
+        if not self.frozen[j]:
+            release = int(instance.rel_date[instance.job_project[j]])
+            latest = max(horizon - shortest, release)
+            start.with_domain(cp_model.Domain(release, latest))
+        earliest = start.domain.min() + shortest
+        self.job_vars.ends[j].with_domain(
+            cp_model.Domain(earliest, max(horizon, earliest))
+        )
+
+    def widen_domains(self):
+        """Widens the domains of the jobs that are not frozen and of the
+        project ends to the horizon, and rebuilds the objective on it."""
+        for j in np.flatnonzero(~self.frozen).tolist():
+            self.reset_domains(j)
+        horizon = self.instance.horizon
+        for end in self.project_ends:
+            end.with_domain(cp_model.Domain(min(end.domain.min(), horizon), horizon))
+        self.build_objective()
+
+    def set_duration(self, pronr: int, jobnr: int, duration: int, mode: int = 1):
+        j = self.job_index(pronr, jobnr)
+        instance = self.instance
+        if not 1 <= mode <= instance.mode_count[j]:
+            raise ValueError(f"job {jobnr} of project {pronr} has no mode {mode}")
+        m = int(instance.mode_ptr[j]) + mode - 1
+        longer = duration - int(instance.mode_durations[m])
+        instance.mode_durations[m] = duration
+        if mode == 1:
+            instance.durations[j] = duration
+        interval = self.job_vars.mode_intervals[m]
+        self.model.Proto().constraints[interval.Index()].interval.size.offset = duration
+        if longer > 0:
+            # the added duration may push every later job back
+            instance.info.horizon += longer
+            self.widen_domains()
+        else:
+            self.reset_domains(j)
+
+    def set_capacity(self, resname: str, capacity: int):
+        names = [r.resname for r in self.instance.resources]
+        if resname not in names:
+            raise ValueError(f"unknown resource: {resname}")
+        r = names.index(resname)
+        added = capacity - self.instance.resources[r].resavail
+        self.instance.resources[r] = replace(
+            self.instance.resources[r], resavail=capacity
+        )
+        constraints = self.model.Proto().constraints
+        cumulative, consumption = self.resource_constraints[r]
+        if cumulative is not None:
+            constraints[cumulative.Index()].cumulative.capacity.offset = capacity
+        if consumption is not None:
+            # the bound has the demand of single-mode jobs subtracted, and
+            # the proto wrapper of OR-Tools ignores item assignment
+            domain = constraints[consumption.Index()].linear.domain
+            lower, upper = domain
+            domain.clear()
+            domain.extend([lower, upper + added])
+
+    def add_projects(self, other: Instance):
+        """Appends the projects of another instance with the same resources
+        and other project numbers."""
+        self.instance = self.instance.merge(other)
+        horizon = self.instance.horizon
+        job_vars = create_job_variables(self.model, other, horizon)
+        add_precedence_constraints(self.model, other, job_vars.starts, job_vars.ends)
+        self.project_ends += add_project_ends(self.model, other, job_vars.ends, horizon)
+        self.job_vars.starts += job_vars.starts
+        self.job_vars.ends += job_vars.ends
+        self.job_vars.mode_intervals += job_vars.mode_intervals
+        self.job_vars.presences += job_vars.presences
+        self.frozen = np.concatenate(
+            (self.frozen, np.zeros(other.job_count, dtype=bool))
+        )
+
+        self.clear_constraints(
+            c.Index()
+            for constraints in self.resource_constraints
+            for c in constraints
+            if c is not None
+        )
+        self.resource_constraints = add_resource_constraints(
+            self.model,
+            self.instance,
+            self.job_vars.mode_intervals,
+            self.job_vars.presences,
+        )
+        # the merged horizon is the sum of both
+        self.widen_domains()
+
+    def freeze(self, time: int) -> int:
+        """Fixes the start and mode of the jobs the previous solution starts
+        before time, returning how many jobs were frozen."""
+        if self.solution is None:
+            raise ValueError("freezing needs a previous solution")
+        starts, modes = self.solution
+        started = np.flatnonzero((starts < time) & ~self.frozen[: len(starts)])
+        mode_ptr = self.instance.mode_ptr
+        for j in started.tolist():
+            start = int(starts[j])
+            self.job_vars.starts[j].with_domain(cp_model.Domain(start, start))
+            for m in range(int(mode_ptr[j]), int(mode_ptr[j + 1])):
+                literal = self.job_vars.presences[m]
+                if literal is not None:
+                    value = int(m == mode_ptr[j] + modes[j])
+                    literal.with_domain(cp_model.Domain(value, value))
+        self.frozen[started] = True
+        return len(started)
+
+    def solve(self):
+        """Solves the current model, hinted with the previous solution."""
+        self.model.ClearHints()
+        if self.solution is not None:
+            starts, modes = self.solution
+            for var, start in zip(self.job_vars.starts, starts.tolist()):
+                self.model.AddHint(var, start)
+            mode_ptr = self.instance.mode_ptr
+            for j in np.flatnonzero(self.instance.mode_count[: len(modes)] > 1):
+                for m in range(int(mode_ptr[j]), int(mode_ptr[j + 1])):
+                    self.model.AddHint(
+                        self.job_vars.presences[m], int(m == mode_ptr[j] + modes[j])
+                    )
+
+        self.solver = cp_model.CpSolver()
+        self.config.apply(self.solver)
+        self.collector = SolutionCollector(
+            self.instance,
+            self.job_vars.starts,
+            self.job_vars.ends,
+            self.config.collect,
+            self.config.keep,
+        )
+        status = self.solver.Solve(self.model, self.collector)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.solution = (
+                np.array([self.solver.Value(v) for v in self.job_vars.starts]),
+                self.job_vars.selected_modes(self.solver, self.instance),
+            )
+        return status
@@ -11,120 +11,510 @@ Hard constraints:
         - do not use more resources than available
         - renewable: resources are replenished, capacity per day
         - nonrenewable: resources are not replenished, capacity is for all days
+        - doubly constrained: both of the above
     -Project deadline:
         - some projects have a deadline
 
 More constraints can be added to make this problem more realistic:
     - limit the duration of the whole multi-project schedule (hard)
     - minimize the duration (makespan) of each project (soft)
+    - minimize the weighted tardiness of projects past their due date (soft)
+Jobs never start before the release date of their project.
 """
 
+import math
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+import numpy as np
 from ortools.sat.python import cp_model
-from structs import Project, Resource
+from structs import Instance
+
+from .config import OBJECTIVES, SolverConfig
+from .heuristic import heuristic_schedule
+from .precedence import PrecedenceGraph, build_precedence_graph, emit_precedences
+from .preprocess import Bounds, compute_bounds
+from .telemetry import Telemetry
+
+COLLECTOR_MODES = ("best", "trace", "all")
+TIEBREAK_MODES = (None, "lexicographic", "weighted")
 
 
 class SolutionCollector(cp_model.CpSolverSolutionCallback):
-    def __init__(self, projects, job_start_vars, job_end_vars):
+    """Records the (time, objective, bound) trace of improving solutions and,
+    depending on mode, their start times:
+        - best: start time arrays of the last `keep` (best) solutions
+        - trace: no solution values
+        - all: a (pronr, jobnr) -> (start, end) dict for every solution
+    With a weighted tiebreak, the trace holds the primary objective and
+    incumbent the (objective, bound) of the search as solved.
+    """
+
+    def __init__(
+        self,
+        instance: Instance,
+        job_start_vars,
+        job_end_vars,
+        mode="best",
+        keep=1,
+        weight=1,
+    ):
         super().__init__()
-        self.projects = projects
+        if mode not in COLLECTOR_MODES:
+            raise ValueError(f"unknown collector mode: {mode}")
+        self.mode = mode
+        self.weight = weight
+        self.incumbent = None
+        self.keys = list(
+            zip(
+                instance.pronr[instance.job_project].tolist(),
+                instance.jobnr.tolist(),
+            )
+        )
         self.job_start_vars = job_start_vars
         self.job_end_vars = job_end_vars
-        self.solutions = []
+        self.start_index = np.array([v.Index() for v in job_start_vars], dtype=np.int64)
+        self.end_index = np.array([v.Index() for v in job_end_vars], dtype=np.int64)
+        self.solutions = deque(maxlen=keep) if mode == "best" else []
+        self.trace = []
 
     def on_solution_callback(self):
+        objective, bound = self.ObjectiveValue(), self.BestObjectiveBound()
+        self.incumbent = (objective, bound)
+        self.trace.append(
+            (self.WallTime(), *primary_objective((objective, bound), self.weight))
+        )
+
+        if self.mode == "best":
+            values = np.asarray(self.Response().solution)
+            makespan = int(values[self.end_index].max(initial=0))
+            self.solutions.append((values[self.start_index], makespan))
+        elif self.mode == "all":
+            self.solutions.append(self.get_solution())
+
+    def get_solution(self) -> tuple[dict, int]:
         solution = {}
         makespan_value = 0
 
-        for project in self.projects:
-            for job in project.jobs:
-                start = self.Value(self.job_start_vars[(project.pronr, job.jobnr)])
-                end = self.Value(self.job_end_vars[(project.pronr, job.jobnr)])
-                solution[(project.pronr, job.jobnr)] = (start, end)
-                makespan_value = max(makespan_value, end)
+        for key, start_var, end_var in zip(
+            self.keys, self.job_start_vars, self.job_end_vars
+        ):
+            start = self.Value(start_var)
+            end = self.Value(end_var)
+            solution[key] = (start, end)
+            makespan_value = max(makespan_value, end)
+
+        return solution, makespan_value
+
+
+@dataclass
+class JobVariables:
+    """Start and end variables per job, an interval per mode and, for jobs
+    with several modes, the presence literal of each mode."""
+
+    starts: list
+    ends: list
+    mode_intervals: list
+    presences: list
+
+    def selected_modes(self, solver, instance: Instance) -> np.ndarray:
+        modes = np.zeros(instance.job_count, dtype=np.int64)
+        for j in np.flatnonzero(instance.mode_count > 1).tolist():
+            first = int(instance.mode_ptr[j])
+            for m in range(first, int(instance.mode_ptr[j + 1])):
+                if solver.BooleanValue(self.presences[m]):
+                    modes[j] = m - first
+        return modes
+
+
+def create_job_variables(model, instance: Instance, horizon, bounds: Bounds = None):
+    job_start_vars, job_end_vars = [], []
+    mode_intervals, presences = [], []
 
-        self.solutions.append((solution, makespan_value))
+    durations = instance.min_durations
+    if bounds is not None and bounds.feasible:
+        start_min = bounds.earliest_start.tolist()
+        start_max = bounds.latest_start.tolist()
+        end_max = bounds.latest_finish.tolist()
+    else:
+        start_min = instance.rel_date[instance.job_project].tolist()
+        start_max = (horizon - durations).tolist()
+        end_max = [horizon] * instance.job_count
 
+    pronr = instance.pronr[instance.job_project].tolist()
+    mode_ptr = instance.mode_ptr.tolist()
+    mode_durations = instance.mode_durations.tolist()
+    for j, (p, jobnr, duration) in enumerate(
+        zip(pronr, instance.jobnr.tolist(), durations.tolist())
+    ):
+        modes = mode_durations[mode_ptr[j] : mode_ptr[j + 1]]
+        start, end, intervals, literals = create_job_for_project(
+            model, p, jobnr, modes, start_min[j], start_max[j], end_max[j]
+        )
+        job_start_vars.append(start)
+        job_end_vars.append(end)
+        mode_intervals.extend(intervals)
+        presences.extend(literals)
+
+    return JobVariables(job_start_vars, job_end_vars, mode_intervals, presences)
+
+
+def create_job_for_project(model, pronr, jobnr, modes, start_min, start_max, end_max):
+    """Creates the start and end of a job and an interval per mode, optional
+    intervals of which exactly one is present when there are several modes."""
+    name = f"p{pronr}_j{jobnr}"
+    start = model.NewIntVar(start_min, start_max, f"s_{name}")
+    end = model.NewIntVar(start_min + min(modes), end_max, f"e_{name}")
+    if len(modes) == 1:
+        interval = model.NewIntervalVar(start, modes[0], end, f"i_{name}")
+        return start, end, [interval], [None]
 
-def create_job_variables(model, projects, horizon):
-    job_start_vars, job_end_vars, job_intervals = {}, {}, {}
+    intervals, literals = [], []
+    for m, duration in enumerate(modes):
+        literal = model.NewBoolVar(f"m_{name}_{m + 1}")
+        intervals.append(
+            model.NewOptionalIntervalVar(
+                start, duration, end, literal, f"i_{name}_{m + 1}"
+            )
+        )
+        literals.append(literal)
+    model.AddExactlyOne(literals)
+    return start, end, intervals, literals
 
-    for project in projects:
-        for job in project.jobs:
-            start, end, interval = create_job_for_project(model, job, project, horizon)
-            job_start_vars[(project.pronr, job.jobnr)] = start
-            job_end_vars[(project.pronr, job.jobnr)] = end
-            job_intervals[(project.pronr, job.jobnr)] = interval
 
-    return job_start_vars, job_end_vars, job_intervals
+def add_precedence_constraints(
+    model, instance: Instance, job_start_vars, job_end_vars, reduce: bool = True
+) -> PrecedenceGraph:
+    """Adds the arcs of the checked, and unless reduce is off transitively
+    reduced, precedence graph, which is returned."""
+    graph = build_precedence_graph(instance, reduce)
+    emit_precedences(model, graph, job_start_vars, job_end_vars)
+    return graph
 
 
-def create_job_for_project(model, job, project, horizon):
-    start = model.NewIntVar(0, horizon, f"s_p{project.pronr}_j{job.jobnr}")
-    end = model.NewIntVar(0, horizon, f"e_p{project.pronr}_j{job.jobnr}")
-    interval = model.NewIntervalVar(
-        start, job.duration, end, f"i_p{project.pronr}_j{job.jobnr}"
+def add_resource_constraints(model, instance: Instance, mode_intervals, mode_presences):
+    """Returns the (cumulative, consumption) constraints of every resource,
+    None where the resource type has no such constraint."""
+    constraints = []
+    per_period, per_total = instance.per_period, instance.per_total
+    for r, resource in enumerate(instance.resources):
+        demands = instance.mode_demands[:, r]
+        cumulative = consumption = None
+        if per_period[r]:
+            modes = np.flatnonzero(demands > 0)
+            cumulative = model.AddCumulative(
+                [mode_intervals[m] for m in modes.tolist()],
+                demands[modes].tolist(),
+                resource.resavail,
+            )
+        if per_total[r]:
+            consumption = add_consumption_constraint(
+                model, instance, demands, mode_presences, resource.resavail
+            )
+        constraints.append((cumulative, consumption))
+    return constraints
+
+
+def add_consumption_constraint(
+    model, instance: Instance, demands, mode_presences, capacity
+):
+    """Limits the summed demand of the selected modes, single-mode jobs add
+    a constant, folded into the bound, and the others their presence
+    literals weighted by demand."""
+    single = instance.mode_count == 1
+    fixed = int(demands[instance.mode_ptr[:-1][single]].sum())
+    modes = np.flatnonzero((demands > 0) & ~np.repeat(single, instance.mode_count))
+    consumption = cp_model.LinearExpr.WeightedSum(
+        [mode_presences[m] for m in modes.tolist()], demands[modes].tolist()
     )
-    return start, end, interval
-
-
-def add_precedence_constraints(model, projects, job_start_vars, job_end_vars):
-    for project in projects:
-        for job in project.jobs:
-            for successor in job.successors:
-                if successor != 0:
-                    model.Add(
-                        job_start_vars[(project.pronr, successor)]
-                        >= job_end_vars[(project.pronr, job.jobnr)]
-                    )
-
-
-def add_resource_constraints(model, projects, resources, job_intervals):
-    for resource in resources:
-        if resource.renewable == "renewable":
-            intervals, demands = [], []
-            for project in projects:
-                for job in project.jobs:
-                    demands.append(job.resources[resource.resname])
-                    intervals.append(job_intervals[(project.pronr, job.jobnr)])
-            model.AddCumulative(intervals, demands, resource.resavail)
-
-
-def add_makespan_objective(model, projects, job_end_vars, horizon):
-    makespan = model.NewIntVar(0, horizon, "makespan")
-    model.AddMaxEquality(
-        makespan,
-        [
-            job_end_vars[(project.pronr, job.jobnr)]
-            for project in projects
-            for job in project.jobs
-        ],
+    return model.Add(consumption + fixed <= capacity)
+
+
+def add_project_ends(model, instance: Instance, job_end_vars, horizon, bounds=None):
+    """Creates one end variable per project, the latest end of its jobs."""
+    # jobs with successors always end before one of their successors does
+    sinks = np.flatnonzero(
+        np.bincount(instance.arcs()[0], minlength=instance.job_count) == 0
     )
-    model.Minimize(makespan)
-    return makespan
+    groups = np.split(sinks, np.searchsorted(sinks, instance.project_ptr[1:-1]))
+    lower = [0] * instance.project_count
+    if bounds is not None and bounds.feasible:
+        finish = bounds.earliest_start + instance.min_durations
+        lower = np.maximum.reduceat(finish, instance.project_ptr[:-1]).tolist()
+
+    project_ends = []
+    for pronr, lb, jobs in zip(instance.pronr.tolist(), lower, groups):
+        end = model.NewIntVar(min(lb, horizon), horizon, f"end_p{pronr}")
+        model.AddMaxEquality(end, [job_end_vars[j] for j in jobs.tolist()])
+        project_ends.append(end)
+    return project_ends
+
+
+def add_objective(
+    model, instance: Instance, project_ends, horizon, config, lower_bound=0, hint=None
+):
+    """Minimizes the makespan, the total weighted tardiness of the projects
+    or makespan_weight * makespan plus the weighted tardiness. hint holds the
+    project ends of a hinted schedule, which also hint the objective terms."""
+    if config.objective not in OBJECTIVES:
+        raise ValueError(f"unknown objective: {config.objective}")
+    makespan = model.NewIntVar(min(lower_bound, horizon), horizon, "makespan")
+    model.AddMaxEquality(makespan, project_ends)
+    if hint is not None:
+        model.AddHint(makespan, int(hint.max(initial=0)))
+    if config.objective == "makespan":
+        model.Minimize(makespan)
+        return makespan, makespan
+
+    tardiness = []
+    for pronr, due_date, end in zip(
+        instance.pronr.tolist(), instance.due_date.tolist(), project_ends
+    ):
+        late = model.NewIntVar(0, max(horizon - due_date, 0), f"tardiness_p{pronr}")
+        model.Add(late >= end - due_date)
+        tardiness.append(late)
+    if hint is not None:
+        for late, value in zip(tardiness, (hint - instance.due_date).tolist()):
+            model.AddHint(late, max(value, 0))
+    objective = cp_model.LinearExpr.WeightedSum(tardiness, instance.tardcost.tolist())
+    if config.objective == "combined":
+        objective = objective + config.makespan_weight * makespan
+    model.Minimize(objective)
+    return objective, makespan
+
+
+def add_energy_constraints(model, instance: Instance, mode_presences, makespan):
+    """Redundant bound of the makespan by the work on every per-period
+    resource, counted through the presence literals for jobs with several
+    modes."""
+    single = np.repeat(instance.mode_count == 1, instance.mode_count)
+    work = instance.mode_durations.astype(np.int64)[:, None] * instance.mode_demands
+    per_period = instance.per_period
+    for r, resource in enumerate(instance.resources):
+        if not per_period[r] or resource.resavail <= 0:
+            continue
+        modes = np.flatnonzero(~single & (work[:, r] > 0))
+        energy = cp_model.LinearExpr.WeightedSum(
+            [mode_presences[m] for m in modes.tolist()], work[modes, r].tolist()
+        )
+        model.Add(energy + int(work[single, r].sum()) <= resource.resavail * makespan)
+
+
+def add_hint(model, instance: Instance, job_vars: JobVariables, starts, modes):
+    """Hints the job variables and returns the hinted end of every project."""
+    selected = instance.mode_ptr[:-1] + modes
+    ends = starts + instance.mode_durations[selected]
+    for start_var, end_var, start, end in zip(
+        job_vars.starts, job_vars.ends, starts.tolist(), ends.tolist()
+    ):
+        model.AddHint(start_var, start)
+        model.AddHint(end_var, end)
+    for j in np.flatnonzero(instance.mode_count > 1).tolist():
+        for m in range(int(instance.mode_ptr[j]), int(instance.mode_ptr[j + 1])):
+            model.AddHint(job_vars.presences[m], int(m == selected[j]))
+    return np.maximum.reduceat(ends, instance.project_ptr[:-1])
+
+
+def add_tiebreak_objective(model, instance: Instance, job_start_vars, objective):
+    """Minimizes the objective first and the sum of start times second in one
+    weighted objective, the weight exceeds any possible sum of start times.
+    Returns the weight."""
+    weight = instance.job_count * instance.horizon + 1
+    model.Minimize(objective * weight + cp_model.LinearExpr.Sum(job_start_vars))
+    return weight
+
+
+def primary_objective(values, weight: int) -> tuple:
+    """The primary objective of weighted objective values, or bounds, as
+    floats. The floor of a bound divided by the weight still bounds it."""
+    return tuple(
+        float(value // weight) if math.isfinite(value) else value for value in values
+    )
+
+
+@dataclass
+class SolveResult:
+    """The result of solve_scheduling: the status, objective and bound of the
+    search, the start times and modes of the schedule found and the
+    solutions kept by the collector. phases holds the statistics of every
+    CP-SAT solve, search and, with the lexicographic tiebreak, tiebreak,
+    with the objective as solved. start_sum is the sum of start times of the
+    schedule when a tiebreak minimized it."""
+
+    status: str
+    objective: float = None
+    bound: float = None
+    starts: np.ndarray = None
+    modes: np.ndarray = None
+    solutions: list = field(default_factory=list)
+    phases: dict = field(default_factory=dict)
+    start_sum: float = None
+
+    @property
+    def found(self) -> bool:
+        return self.status in ("OPTIMAL", "FEASIBLE")
+
+
+def solve_stats(solver, status) -> dict:
+    """The status, objective, bound and search statistics of one solve."""
+    return {
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue(),
+        "best_bound": solver.BestObjectiveBound(),
+        "wall_time": solver.WallTime(),
+        "user_time": solver.UserTime(),
+        "deterministic_time": solver.ResponseProto().deterministic_time,
+        "num_branches": solver.NumBranches(),
+        "num_conflicts": solver.NumConflicts(),
+        "num_booleans": solver.NumBooleans(),
+    }
+
+
+def solve_tiebreak(model, solver, collector, config, job_start_vars, objective):
+    """Bounds the objective by the value of the first solve and minimizes the
+    sum of start times on a second solver, hinted with the first solution,
+    within the time the first solve left. Returns the second solver and its
+    status, None if no time was left."""
+    time_limit = None
+    if config.time_limit:
+        time_limit = config.time_limit - solver.WallTime()
+        if time_limit <= 0:
+            return None
+    model.Add(objective <= int(solver.ObjectiveValue()))
+    model.ClearHints()
+    for var in job_start_vars:
+        model.AddHint(var, solver.Value(var))
+    model.Minimize(cp_model.LinearExpr.Sum(job_start_vars))
+    second = cp_model.CpSolver()
+    config.apply(second)
+    if time_limit is not None:
+        second.parameters.max_time_in_seconds = time_limit
+    return second, second.Solve(model, collector)
 
 
 def solve_scheduling(
-    projects: list[Project], resources: list[Resource], horizon: int, tiebreaker=None
+    instance: Instance,
+    tiebreaker=None,
+    config: SolverConfig = None,
+    bounds: Bounds = None,
+    hint: tuple[np.ndarray, np.ndarray] = None,
+    telemetry: Telemetry = None,
+    incumbent=None,
 ):
-    model = cp_model.CpModel()
-    job_starts, job_ends, job_intervals = create_job_variables(model, projects, horizon)
-    add_precedence_constraints(model, projects, job_starts, job_ends)
-    add_resource_constraints(model, projects, resources, job_intervals)
-    add_makespan_objective(model, projects, job_ends, horizon)
+    """Builds and solves the model and returns a SolveResult.
+    incumbent.watch(solver, collector) wraps the search: a
+    portfolio.Incumbent shares the objective with concurrent solves and stops
+    this one once it cannot do better, a service job streams the solutions
+    and stops on cancel."""
+    horizon = instance.horizon
+    config = config or SolverConfig()
+    telemetry = telemetry or Telemetry()
+    if bounds is None and config.preprocess:
+        with telemetry.phase("preprocess"):
+            bounds = compute_bounds(instance)
+    if hint is None and config.warm_start:
+        with telemetry.phase("heuristic"):
+            schedule = heuristic_schedule(
+                instance, config.warm_start, config.passes, config.random_seed, bounds
+            )
+        # without modes that fit the nonrenewable capacities, solve unhinted
+        hint = None if schedule is None else schedule[:2]
 
-    solver = cp_model.CpSolver()
-    collector = SolutionCollector(projects, job_starts, job_ends)
-    status = solver.SolveWithSolutionCallback(model, collector)
-    # status = solver.Solve(model)
+    with telemetry.phase("build"):
+        model = cp_model.CpModel()
+        job_vars = create_job_variables(model, instance, horizon, bounds)
+        job_starts, job_ends = job_vars.starts, job_vars.ends
+        graph = add_precedence_constraints(
+            model,
+            instance,
+            job_starts,
+            job_ends,
+            config.preprocess and not config.redundant,
+        )
+        telemetry.counts["removed_arcs"] = graph.removed
+        add_resource_constraints(
+            model, instance, job_vars.mode_intervals, job_vars.presences
+        )
+        project_ends = add_project_ends(model, instance, job_ends, horizon, bounds)
+        # a complete hint is loaded as the first solution without a repair search
+        project_hint = None
+        if hint is not None:
+            project_hint = add_hint(model, instance, job_vars, *hint)
+            for end, value in zip(project_ends, project_hint.tolist()):
+                model.AddHint(end, value)
+        objective, makespan = add_objective(
+            model,
+            instance,
+            project_ends,
+            horizon,
+            config,
+            bounds.lower_bound if bounds else 0,
+            project_hint,
+        )
+        if config.redundant:
+            add_energy_constraints(model, instance, job_vars.presences, makespan)
+
+        if config.tiebreak not in TIEBREAK_MODES:
+            raise ValueError(f"unknown tiebreak mode: {config.tiebreak}")
+        weight = 1
+        if config.tiebreak == "weighted":
+            weight = add_tiebreak_objective(model, instance, job_starts, objective)
 
-    if tiebreaker and len(set([m for _, m in collector.solutions])) < len(
-        collector.solutions
+    solver = cp_model.CpSolver()
+    config.apply(solver)
+    if hint is not None:
+        # presolve may otherwise drop the hinted solution and start from scratch
+        solver.parameters.keep_all_feasible_solutions_in_presolve = True
+    collector = SolutionCollector(
+        instance, job_starts, job_ends, config.collect, config.keep, weight
+    )
+    with telemetry.phase("solve"), (
+        incumbent.watch(solver, collector) if incumbent else nullcontext()
     ):
-        print("Tied makespan values found, applying tiebreaker.")
-        collector.solutions.sort(key=lambda x: (x[1], tiebreaker(x[0])))
+        status = solver.Solve(model, collector)
+    result = SolveResult(
+        solver.StatusName(status), phases={"search": solve_stats(solver, status)}
+    )
+    objective_value, bound = primary_objective(
+        (solver.ObjectiveValue(), solver.BestObjectiveBound()), weight
+    )
+    result.bound = bound
+    if result.found:
+        result.objective = objective_value
+        if config.tiebreak == "weighted":
+            result.start_sum = solver.ObjectiveValue() % weight
+    values = solver
+    if config.tiebreak == "lexicographic" and result.found:
+        with telemetry.phase("tiebreak"):
+            trace = len(collector.trace)
+            second = solve_tiebreak(
+                model, solver, collector, config, job_starts, objective
+            )
+            # the trace holds the objective of the first phase only
+            del collector.trace[trace:]
+        # without a tiebreak solution the first one stands
+        if second is not None:
+            second, second_status = second
+            result.phases["tiebreak"] = solve_stats(second, second_status)
+            if second_status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                values = second
+                result.objective = float(second.Value(objective))
+                result.start_sum = second.ObjectiveValue()
+    if result.found:
+        result.starts = np.array([values.Value(v) for v in job_starts])
+        result.modes = job_vars.selected_modes(values, instance)
+    telemetry.record_result(result, collector)
 
-    return status, solver, job_starts, collector.solutions
+    solutions = list(collector.solutions)
+    if tiebreaker and len(set([m for _, m in solutions])) < len(solutions):
+        print("Tied makespan values found, applying tiebreaker.")
+        solutions.sort(key=lambda x: (x[1], tiebreaker(x[0])))
+    result.solutions = solutions
+    return result
 
 
 def tiebreaker(solution):
-    return sum(start for start, _ in solution.values())
+    if isinstance(solution, dict):
+        return sum(start for start, _ in solution.values())
+    return int(solution.sum())
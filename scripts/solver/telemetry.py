@@ -0,0 +1,51 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class Telemetry:
+    """Collects the wall time of each phase of a run, counts such as the
+    removed precedence arcs, the CP-SAT statistics and the (seconds,
+    objective, bound) trace of improving solutions."""
+
+    def __init__(self):
+        self.phases = {}
+        self.counts = {}
+        self.stats = {}
+        self.trace = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def record_result(self, result, collector=None):
+        """Records the status, objective and bound of a SolveResult with the
+        statistics of each of its CP-SAT solves."""
+        self.stats = {
+            "status": result.status,
+            "objective": result.objective,
+            "best_bound": result.bound,
+            **result.phases,
+        }
+        if result.start_sum is not None:
+            self.stats["start_sum"] = result.start_sum
+        if collector is not None:
+            self.trace = [list(point) for point in collector.trace]
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {name: round(t, 6) for name, t in self.phases.items()},
+            "counts": self.counts,
+            "stats": self.stats,
+            "trace": self.trace,
+        }
+
+    def write(self, file_path: str, **fields):
+        """Appends the telemetry and the given fields as one JSON line."""
+        with open(file_path, "a") as file:
+            file.write(json.dumps({**fields, **self.to_dict()}) + "\n")
@@ -0,0 +1,153 @@
+"""
+Independent feasibility check of a schedule, given as start times and modes,
+against its instance. It shares no code with the model, so it also checks
+schedules of the heuristic, the decomposition or external tools:
+    - every start and mode exists, no job starts before its release date
+      and every job ends by the horizon
+    - every precedence arc: the successor starts after the job ends
+    - per-period resources: the usage profile never exceeds the capacity,
+      swept over the sorted start and end events as a difference array
+    - per-total resources: the demand of the selected modes fits
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+from structs import Instance
+
+# violations described per kind, the rest are only counted
+MAX_REPORTED = 5
+
+
+@dataclass
+class ValidationReport:
+    counts: dict = field(default_factory=dict)
+    messages: list = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.counts
+
+    def add(self, kind: str, messages: list[str], count: int):
+        if count:
+            self.counts[kind] = self.counts.get(kind, 0) + count
+            self.messages += messages[:MAX_REPORTED]
+
+    def __str__(self):
+        if self.valid:
+            return "Schedule valid"
+        counts = ", ".join(f"{count} {kind}" for kind, count in self.counts.items())
+        return "\n".join([f"Schedule invalid: {counts}"] + self.messages)
+
+
+def job_name(instance: Instance, j: int) -> str:
+    return (
+        f"job {instance.jobnr[j]} of project {instance.pronr[instance.job_project[j]]}"
+    )
+
+
+def usage_profile(
+    starts: np.ndarray, ends: np.ndarray, demands: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the event times and the usage (events x resources) from each
+    time until the next one. Ends sort before starts at the same time, so a
+    job may start the day another one ends."""
+    times = np.concatenate((ends, starts))
+    order = np.argsort(times, kind="stable")
+    changes = np.concatenate((-demands, demands))[order]
+    times = times[order]
+    usage = np.cumsum(changes, axis=0)
+    # the usage after the last event of every time holds until the next time
+    last = np.append(times[1:] != times[:-1], True)
+    return times[last], usage[last]
+
+
+def validate_schedule(
+    instance: Instance, starts: np.ndarray, modes: np.ndarray = None
+) -> ValidationReport:
+    """Checks the start times and the modes (indexed from 0 within each job,
+    the first mode if None) against the instance."""
+    report = ValidationReport()
+    n = instance.job_count
+    starts = np.asarray(starts, dtype=np.int64)
+    modes = np.zeros(n, dtype=np.int64) if modes is None else np.asarray(modes)
+    if starts.shape != (n,) or modes.shape != (n,):
+        report.add(
+            "shape",
+            [f"expected {n} starts and modes, got {len(starts)} and {len(modes)}"],
+            1,
+        )
+        return report
+
+    bad = np.flatnonzero((modes < 0) | (modes >= instance.mode_count))
+    report.add(
+        "mode",
+        [
+            f"{job_name(instance, j)} has no mode {modes[j] + 1}"
+            for j in bad[:MAX_REPORTED]
+        ],
+        len(bad),
+    )
+    if len(bad):
+        return report
+    selected = instance.mode_ptr[:-1] + modes
+    ends = starts + instance.mode_durations[selected]
+    demands = instance.mode_demands[selected].astype(np.int64)
+
+    release = instance.rel_date[instance.job_project]
+    early = np.flatnonzero(starts < release)
+    report.add(
+        "release",
+        [
+            f"{job_name(instance, j)} starts at {starts[j]} before {release[j]}"
+            for j in early[:MAX_REPORTED]
+        ],
+        len(early),
+    )
+    late = np.flatnonzero(ends > instance.horizon)
+    report.add(
+        "horizon",
+        [
+            f"{job_name(instance, j)} ends at {ends[j]} after {instance.horizon}"
+            for j in late[:MAX_REPORTED]
+        ],
+        len(late),
+    )
+
+    sources, targets = instance.arcs()
+    broken = np.flatnonzero(starts[targets] < ends[sources])
+    report.add(
+        "precedence",
+        [
+            f"{job_name(instance, targets[a])} starts at {starts[targets[a]]} "
+            f"before {job_name(instance, sources[a])} ends at {ends[sources[a]]}"
+            for a in broken[:MAX_REPORTED]
+        ],
+        len(broken),
+    )
+
+    capacity = instance.capacity
+    names = [r.resname for r in instance.resources]
+    per_period = np.flatnonzero(instance.per_period)
+    if len(per_period) and n:
+        times, usage = usage_profile(starts, ends, demands[:, per_period])
+        for i, r in enumerate(per_period.tolist()):
+            over = np.flatnonzero(usage[:-1, i] > capacity[r])
+            report.add(
+                "capacity",
+                [
+                    f"{names[r]} uses {usage[e, i]} > {capacity[r]} "
+                    f"from {times[e]} to {times[e + 1]}"
+                    for e in over[:MAX_REPORTED]
+                ],
+                len(over),
+            )
+
+    totals = demands.sum(axis=0)
+    for r in np.flatnonzero(instance.per_total & (totals > capacity)).tolist():
+        report.add(
+            "consumption",
+            [f"{names[r]} consumes {totals[r]} > {capacity[r]}"],
+            1,
+        )
+    return report
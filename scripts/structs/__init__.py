@@ -1,7 +1,9 @@
+from .instance import Instance
 from .structs import Info, Job, Project, Resource
 
 __all__ = [
     "Info",
+    "Instance",
     "Job",
     "Project",
     "Resource",
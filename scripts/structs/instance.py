@@ -0,0 +1,241 @@
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+from .structs import Info, Job, Project, Resource
+
+
+@dataclass
+class Instance:
+    """Array-backed instance: one row per job, jobs of project p are
+    project_ptr[p]:project_ptr[p + 1] and successors are stored in CSR form.
+    Modes of job j are mode_ptr[j]:mode_ptr[j + 1] of the mode arrays,
+    durations and demands hold the first mode of every job."""
+
+    info: Info
+    resources: list[Resource]
+    pronr: np.ndarray
+    jobs_number: np.ndarray
+    rel_date: np.ndarray
+    due_date: np.ndarray
+    tardcost: np.ndarray
+    mpm_time: np.ndarray
+    project_ptr: np.ndarray
+    jobnr: np.ndarray
+    modes: np.ndarray
+    durations: np.ndarray
+    demands: np.ndarray
+    succ_ptr: np.ndarray
+    succ_jobnr: np.ndarray
+    mode_ptr: np.ndarray = None
+    mode_durations: np.ndarray = None
+    mode_demands: np.ndarray = None
+    job_project: np.ndarray = field(init=False, repr=False)
+    succ_idx: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.mode_ptr is None:
+            self.mode_ptr = np.arange(self.job_count + 1, dtype=np.int64)
+            self.mode_durations = self.durations
+            self.mode_demands = self.demands
+        self.job_project = np.repeat(
+            np.arange(len(self.pronr), dtype=np.int32), np.diff(self.project_ptr)
+        )
+        self.succ_idx = self.successor_index()
+
+    @property
+    def project_count(self) -> int:
+        return len(self.pronr)
+
+    @property
+    def job_count(self) -> int:
+        return len(self.jobnr)
+
+    @property
+    def horizon(self) -> int:
+        return self.info.horizon
+
+    @property
+    def capacity(self) -> np.ndarray:
+        return np.array([r.resavail for r in self.resources], dtype=np.int64)
+
+    @property
+    def per_period(self) -> np.ndarray:
+        """Resources whose capacity holds in every period."""
+        return np.array(
+            [
+                r.renewable in ("renewable", "doubly constrained")
+                for r in self.resources
+            ],
+            dtype=bool,
+        )
+
+    @property
+    def per_total(self) -> np.ndarray:
+        """Resources whose capacity holds for the whole schedule."""
+        return np.array(
+            [
+                r.renewable in ("nonrenewable", "doubly constrained")
+                for r in self.resources
+            ],
+            dtype=bool,
+        )
+
+    @property
+    def mode_count(self) -> np.ndarray:
+        return np.diff(self.mode_ptr)
+
+    @property
+    def mode_job(self) -> np.ndarray:
+        return np.repeat(np.arange(self.job_count, dtype=np.int32), self.mode_count)
+
+    @property
+    def multi_mode(self) -> bool:
+        return len(self.mode_durations) > self.job_count
+
+    @property
+    def min_durations(self) -> np.ndarray:
+        if not self.multi_mode:
+            return self.durations
+        return np.minimum.reduceat(self.mode_durations, self.mode_ptr[:-1])
+
+    def with_modes(self, modes: np.ndarray) -> "Instance":
+        """Returns a copy whose durations and demands are the given modes,
+        indexed from 0 within each job."""
+        selected = self.mode_ptr[:-1] + modes
+        return replace(
+            self,
+            durations=self.mode_durations[selected],
+            demands=self.mode_demands[selected],
+        )
+
+    def merge(self, other: "Instance") -> "Instance":
+        """Returns an instance with the projects of other appended, both
+        must use the same resources and other project numbers."""
+        if [r.resname for r in self.resources] != [r.resname for r in other.resources]:
+            raise ValueError("instances use different resources")
+        shared = np.intersect1d(self.pronr, other.pronr)
+        if len(shared):
+            raise ValueError(f"project numbers already used: {shared.tolist()}")
+        info = replace(
+            self.info,
+            project_count=self.project_count + other.project_count,
+            job_count=self.job_count + other.job_count,
+            horizon=self.horizon + other.horizon,
+        )
+
+        def offset(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            return np.concatenate((a, b[1:] + a[-1]))
+
+        return Instance(
+            info,
+            list(self.resources),
+            *(
+                np.concatenate((getattr(self, a), getattr(other, a)))
+                for a in (
+                    "pronr",
+                    "jobs_number",
+                    "rel_date",
+                    "due_date",
+                    "tardcost",
+                    "mpm_time",
+                )
+            ),
+            offset(self.project_ptr, other.project_ptr),
+            *(
+                np.concatenate((getattr(self, a), getattr(other, a)))
+                for a in ("jobnr", "modes", "durations", "demands")
+            ),
+            offset(self.succ_ptr, other.succ_ptr),
+            np.concatenate((self.succ_jobnr, other.succ_jobnr)),
+            offset(self.mode_ptr, other.mode_ptr),
+            np.concatenate((self.mode_durations, other.mode_durations)),
+            np.concatenate((self.mode_demands, other.mode_demands)),
+        )
+
+    def successor_index(self) -> np.ndarray:
+        """Maps each successor job number to its global job index, -1 if missing."""
+        if self.job_count == 0:
+            return np.full(len(self.succ_jobnr), -1, dtype=np.int32)
+        base = int(self.jobnr.max()) + 1
+        keys = self.job_project.astype(np.int64) * base + self.jobnr
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        owner = np.repeat(self.job_project, np.diff(self.succ_ptr))
+        targets = owner.astype(np.int64) * base + self.succ_jobnr
+        pos = np.minimum(np.searchsorted(sorted_keys, targets), len(keys) - 1)
+        found = (
+            (sorted_keys[pos] == targets)
+            & (self.succ_jobnr > 0)
+            & (self.succ_jobnr < base)
+        )
+        return np.where(found, order[pos], -1).astype(np.int32)
+
+    def arcs(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the (predecessor, successor) global job index pairs."""
+        sources = np.repeat(
+            np.arange(self.job_count, dtype=np.int32), np.diff(self.succ_ptr)
+        )
+        valid = self.succ_idx >= 0
+        return sources[valid], self.succ_idx[valid]
+
+    def job(self, j: int) -> Job:
+        successors = self.succ_jobnr[self.succ_ptr[j] : self.succ_ptr[j + 1]]
+        return Job(
+            int(self.jobnr[j]),
+            int(self.modes[j]),
+            int(self.durations[j]),
+            dict(
+                zip(
+                    [r.resname for r in self.resources],
+                    self.demands[j].tolist(),
+                )
+            ),
+            successors.tolist() if len(successors) else [0],
+        )
+
+    def project(self, p: int) -> Project:
+        return Project(
+            int(self.pronr[p]),
+            int(self.jobs_number[p]),
+            int(self.rel_date[p]),
+            int(self.due_date[p]),
+            int(self.tardcost[p]),
+            int(self.mpm_time[p]),
+            [self.job(j) for j in range(self.project_ptr[p], self.project_ptr[p + 1])],
+        )
+
+    def projects(self) -> list[Project]:
+        return [self.project(p) for p in range(self.project_count)]
+
+    @classmethod
+    def from_projects(
+        cls, info: Info, resources: list[Resource], projects: list[Project]
+    ) -> "Instance":
+        jobs = [job for project in projects for job in project.jobs]
+        successors = [[s for s in job.successors if s != 0] for job in jobs]
+        return cls(
+            info,
+            resources,
+            *(
+                np.array([getattr(p, a) for p in projects], dtype=np.int64)
+                for a in (
+                    "pronr",
+                    "jobs_number",
+                    "rel_date",
+                    "due_date",
+                    "tardcost",
+                    "mpm_time",
+                )
+            ),
+            np.cumsum([0] + [len(p.jobs) for p in projects]),
+            np.array([job.jobnr for job in jobs], dtype=np.int32),
+            np.array([job.mode for job in jobs], dtype=np.int32),
+            np.array([job.duration for job in jobs], dtype=np.int32),
+            np.array(
+                [[job.resources[r.resname] for r in resources] for job in jobs],
+                dtype=np.int32,
+            ).reshape(len(jobs), len(resources)),
+            np.cumsum([0] + [len(s) for s in successors]),
+            np.array([s for succ in successors for s in succ], dtype=np.int32),
+        )
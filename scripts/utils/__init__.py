@@ -1,23 +1,43 @@
-from .file import get_file_data
-from .make import make_data
-from .plot import (
-    plot_results,
-)
-from .print import (
-    print_info,
-    print_makespans,
-    print_projects,
-    print_resources,
-    print_tables,
-)
+"""
+Names are imported from their module on first access, so that parsing does
+not load matplotlib or tabulate.
+"""
 
-__all__ = [
-    "get_file_data",
-    "make_data",
-    "plot_results",
-    "print_info",
-    "print_makespans",
-    "print_projects",
-    "print_resources",
-    "print_tables",
-]
+from importlib import import_module
+
+_MODULES = {
+    "CachedResult": "results",
+    "clear_cache": "cache",
+    "clear_results": "results",
+    "get_file_data": "file",
+    "load_cached_instance": "cache",
+    "load_result": "results",
+    "make_data": "make",
+    "parse_instance": "file",
+    "plot_results": "plot",
+    "print_info": "print",
+    "print_makespans": "print",
+    "print_projects": "print",
+    "print_resources": "print",
+    "print_schedule": "print",
+    "print_tables": "print",
+    "read_instance": "file",
+    "read_schedule": "file",
+    "result_key": "results",
+    "save_result": "results",
+    "write_schedule": "file",
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return __all__
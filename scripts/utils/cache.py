@@ -0,0 +1,74 @@
+import hashlib
+import os
+import shutil
+from dataclasses import astuple, fields
+
+import numpy as np
+
+from structs import Info, Instance, Resource
+
+from .file import read_instance
+
+CACHE_DIR = os.path.join(".cache", "instances")
+CACHE_VERSION = 2
+ARRAY_FIELDS = [
+    f.name for f in fields(Instance) if f.init and f.name not in ("info", "resources")
+]
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_instance(file_path: str, instance: Instance):
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(
+            file,
+            info=np.array(astuple(instance.info), dtype=np.int64),
+            resname=np.array([r.resname for r in instance.resources], dtype=str),
+            resavail=np.array([r.resavail for r in instance.resources], dtype=np.int64),
+            renewable=np.array([r.renewable for r in instance.resources], dtype=str),
+            **{name: getattr(instance, name) for name in ARRAY_FIELDS},
+        )
+    os.replace(tmp_path, file_path)
+
+
+def load_instance(file_path: str) -> Instance:
+    with np.load(file_path) as data:
+        resources = [
+            Resource(str(name), int(qty), str(renewable))
+            for name, qty, renewable in zip(
+                data["resname"], data["resavail"], data["renewable"]
+            )
+        ]
+        return Instance(
+            Info(*data["info"].tolist()),
+            resources,
+            **{name: data[name] for name in ARRAY_FIELDS},
+        )
+
+
+def load_cached_instance(file_path: str, cache_dir: str = CACHE_DIR) -> Instance:
+    """Loads an instance from the cache, parsing and caching it if the file changed."""
+    cache_path = os.path.join(cache_dir, f"{file_hash(file_path)}.npz")
+    if os.path.exists(cache_path):
+        try:
+            return load_instance(cache_path)
+        except (OSError, KeyError, ValueError):
+            os.remove(cache_path)
+
+    instance = read_instance(file_path)
+    save_instance(cache_path, instance)
+    return instance
+
+
+def clear_cache(cache_dir: str = CACHE_DIR):
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+        print(f"Cache cleared: {cache_dir}")
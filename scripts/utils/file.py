@@ -1,5 +1,12 @@
 import json
 import os
+from typing import Iterable
+
+import numpy as np
+
+from structs import Info, Instance, Resource
+
+from .make import get_renewable
 
 
 def clean_key(key: str) -> str:
@@ -74,3 +81,160 @@ def get_file_data(file_path: str, save: bool = False) -> dict:
         file_path = os.path.join("data", f"{os.path.basename(file_path)}.json")
         write_file(file_path, json.dumps(data, indent=2))
     return data
+
+
+def parse_header(line: str) -> list[str]:
+    keys = []
+    for v in line.replace("*", "").replace("\t", " ").lower().split(" "):
+        key = clean_key(v).replace("#", "")
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def split_blocks(jobnr: np.ndarray) -> np.ndarray:
+    """Returns the block offsets of job rows, a block starts where numbering restarts."""
+    return np.concatenate(([0], np.flatnonzero(np.diff(jobnr) < 0) + 1, [len(jobnr)]))
+
+
+def parse_instance(lines: Iterable[str]) -> Instance:
+    """Parses a PSPLIB-style file in a single pass over its lines."""
+    general, summary, availability = {}, [], []
+    jobnr, modes_count, succ_count, succ_jobnr, durations = [], [], [], [], []
+    section, keys, demand_keys, title = None, [], [], False
+
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0].startswith("*"):
+            title = True
+            continue
+        if title:
+            section = clean_key(line.strip()[1:])
+            keys, title = [], False
+            continue
+        if "#" in line:
+            keys = parse_header(line)
+            if section == "duration_and_resources":
+                demand_keys = keys
+            continue
+
+        if section == "precedence_relations":
+            successors = tokens[3:] if len(tokens) > 3 else ()
+            jobnr.append(int(tokens[0]))
+            modes_count.append(int(tokens[1]))
+            succ_count.append(len(successors))
+            succ_jobnr.extend(map(int, successors))
+        elif section == "duration_and_resources":
+            row = tuple(map(int, tokens))
+            if len(row) < len(keys):
+                row = (durations[-1][0],) + row  # mode listed without its job
+            durations.append(row)
+        elif section == "resource_availability":
+            availability.append((tokens[0].lower(), int(tokens[1])))
+        elif ":" in line:
+            key, val = map(clean_key, line.lower().split(":"))
+            general[key] = val.replace("_", " ").split(" ")[0]
+        elif section == "projects_summary" and keys:
+            summary.append(dict(zip(keys, map(int, tokens))))
+
+    if section is None:
+        raise ValueError("data is required")
+
+    info = Info(
+        int(general["projects"]),
+        int(general["jobs_(incl_supersource/sink_)"]),
+        int(general["horizon"]),
+        int(general["renewable"]),
+        int(general["nonrenewable"]),
+        int(general["doubly_constrained"]),
+    )
+    resources = [Resource(name, qty, get_renewable(name)) for name, qty in availability]
+    columns = [demand_keys.index(r.resname) for r in resources]
+
+    jobnr = np.array(jobnr, dtype=np.int32)
+    modes = np.array(durations, dtype=np.int32).reshape(-1, len(demand_keys))
+    # consecutive rows with the same job number are the modes of one job
+    mode_start = np.flatnonzero(np.concatenate(([True], np.diff(modes[:, 0]) != 0)))
+    mode_ptr = np.concatenate((mode_start, [len(modes)]))
+
+    project_ptr = split_blocks(jobnr)
+    duration_ptr = split_blocks(modes[mode_start, 0])
+    if len(project_ptr) - 1 != len(summary) or not np.array_equal(
+        project_ptr, duration_ptr
+    ):
+        raise ValueError(
+            f"expected job blocks for {len(summary)} projects, "
+            f"found {len(project_ptr) - 1} precedence and "
+            f"{len(duration_ptr) - 1} duration blocks"
+        )
+
+    return Instance(
+        info,
+        resources,
+        *(
+            np.array([row[key] for row in summary], dtype=np.int64)
+            for key in ("pronr", "jobs", "rel_date", "duedate", "tardcost", "mpm_time")
+        ),
+        project_ptr,
+        jobnr,
+        np.array(modes_count, dtype=np.int32),
+        modes[mode_start, 2],
+        modes[mode_start][:, columns],
+        np.concatenate(([0], np.cumsum(succ_count))),
+        np.array(succ_jobnr, dtype=np.int32),
+        mode_ptr,
+        modes[:, 2],
+        modes[:, columns],
+    )
+
+
+def read_instance(file_path: str) -> Instance:
+    if not file_path:
+        raise ValueError("file_path is required")
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"file not found: {file_path}")
+
+    with open(file_path, "r") as file:
+        return parse_instance(file)
+
+
+def write_schedule(
+    file_path: str, instance: Instance, starts: np.ndarray, modes: np.ndarray = None
+):
+    """Writes one "pronr jobnr mode start" row per job, modes from 1."""
+    modes = np.zeros(instance.job_count, dtype=np.int64) if modes is None else modes
+    rows = np.column_stack(
+        (instance.pronr[instance.job_project], instance.jobnr, modes + 1, starts)
+    )
+    np.savetxt(file_path, rows, fmt="%d", header="pronr jobnr mode start")
+
+
+def read_schedule(file_path: str, instance: Instance) -> tuple[np.ndarray, np.ndarray]:
+    """Reads the start times and modes (from 0) written by write_schedule or
+    any tool using the same columns, in any row order."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"file not found: {file_path}")
+    rows = np.loadtxt(file_path, dtype=np.int64, comments="#", ndmin=2)
+    if rows.shape[1] != 4:
+        raise ValueError(f"expected 4 columns (pronr jobnr mode start) in {file_path}")
+
+    base = int(max(instance.jobnr.max(initial=0), rows[:, 1].max(initial=0))) + 1
+    keys = instance.pronr[instance.job_project].astype(np.int64) * base + instance.jobnr
+    order = np.argsort(keys)
+    found = np.searchsorted(keys[order], rows[:, 0] * base + rows[:, 1])
+    found = np.minimum(found, len(keys) - 1)
+    known = keys[order][found] == rows[:, 0] * base + rows[:, 1]
+    if not known.all():
+        pronr, jobnr = rows[np.argmin(known), :2]
+        raise ValueError(f"unknown job {jobnr} of project {pronr} in {file_path}")
+    jobs = order[found]
+    if len(np.unique(jobs)) != instance.job_count or len(jobs) != instance.job_count:
+        raise ValueError(f"{file_path} does not schedule every job exactly once")
+
+    starts = np.zeros(instance.job_count, dtype=np.int64)
+    modes = np.zeros(instance.job_count, dtype=np.int64)
+    starts[jobs] = rows[:, 3]
+    modes[jobs] = rows[:, 2] - 1
+    return starts, modes
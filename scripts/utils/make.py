@@ -62,20 +62,24 @@ def make_jobs(
     return jobs
 
 
+def get_renewable(resname: str) -> str:
+    return (
+        "renewable"
+        if resname.startswith("r")
+        else "nonrenewable"
+        if resname.startswith("n")
+        else "doubly constrained"
+        if resname.startswith("d")
+        else "unknown"
+    )
+
+
 def make_resources(data) -> list[Resource]:
     resources = []
     resource_names = data["resource_availability"]["resource"]
     resource_quantity = data["resource_availability"]["qty"]
     for i in range(len(resource_names)):
-        rsname = (
-            "renewable"
-            if resource_names[i].startswith("r")
-            else "nonrenewable"
-            if resource_names[i].startswith("n")
-            else "doubly constrained"
-            if resource_names[i].startswith("d")
-            else "unknown"
-        )
+        rsname = get_renewable(resource_names[i])
         resource = Resource(resource_names[i], int(resource_quantity[i]), rsname)
         resources.append(resource)
     return resources
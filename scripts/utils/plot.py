@@ -1,122 +1,176 @@
-import matplotlib.colors as mcolors
-import matplotlib.pyplot as plt
 import numpy as np
-
-
-def get_tables(projects, resources, solver, job_start_vars) -> tuple:
-    """Generates tables for projects and resources."""
-    days = int(solver.ObjectiveValue())
-    schedule_table = [["Job \\ Day"] + [f"{day+1}" for day in range(days)]]
-    usage_table = [["Resource \\ Day"]] + [[r.resname] for r in resources]
-
-    for project in projects:
-        columns = []
-        resources_values = {}
-        for job in project.jobs:
-            row = ["" for _ in range(days)]
-            start_day = solver.Value(job_start_vars[(project.pronr, job.jobnr)])
-            for day in range(start_day, start_day + job.duration):
-                if day < days:
-                    for r, v in job.resources.items():
-                        if r not in resources_values:
-                            resources_values[r] = [0 for _ in range(days)]
-                        resources_values[r][day] += int(v)
-                        row[day] = f"{r} {v}"
-                    if not job.resources:
-                        row[day] = "N/A"
-            schedule_table.append([f"{job.jobnr:>2}"] + row)
-            columns.append(row)
-
-        usage_table[0].extend([f"{day+1}" for day in range(days)])
-        for i, r in enumerate(resources_values):
-            usage_table[i + 1].extend(map(str, resources_values[r]))
-
+from structs import Instance
+
+MAX_ROWS = 60
+MAX_DAYS = 500
+ANNOTATE_CELLS = 400
+
+
+def get_profiles(instance: Instance, starts: np.ndarray) -> tuple:
+    """Returns the job occupancy matrix (jobs x days) and the resource usage
+    profile (resources x days), built from difference arrays over the start
+    and end days of every job."""
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = starts + instance.durations
+    days = int(ends.max(initial=0))
+    rows = np.arange(instance.job_count)
+
+    occupancy = np.zeros((instance.job_count, days + 1), dtype=np.int8)
+    occupancy[rows, starts] += 1
+    occupancy[rows, ends] -= 1
+    occupancy = np.cumsum(occupancy, axis=1, dtype=np.int8)[:, :days] > 0
+    return occupancy, get_usage(instance, starts)
+
+
+def get_usage(instance: Instance, starts: np.ndarray) -> np.ndarray:
+    """Returns the resource usage profile (resources x days)."""
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = starts + instance.durations
+    days = int(ends.max(initial=0))
+    usage = np.zeros((days + 1, len(instance.resources)), dtype=np.int64)
+    np.add.at(usage, starts, instance.demands)
+    np.add.at(usage, ends, -instance.demands.astype(np.int64))
+    return np.cumsum(usage, axis=0)[:days].T
+
+
+def get_tables(instance: Instance, starts: np.ndarray) -> tuple:
+    """Formats the schedule and resource usage as printable tables."""
+    occupancy, usage = get_profiles(instance, starts)
+    names = [r.resname for r in instance.resources]
+    header = [f"{day + 1}" for day in range(occupancy.shape[1])]
+
+    schedule_table = [["Job \\ Day"] + header]
+    for jobnr, occupied, demands in zip(
+        instance.jobnr.tolist(), occupancy, instance.demands.tolist()
+    ):
+        label = ", ".join(f"{r} {v}" for r, v in zip(names, demands) if v) or "N/A"
+        schedule_table.append([f"{jobnr:>2}"] + np.where(occupied, label, "").tolist())
+    usage_table = [["Resource \\ Day"] + header] + [
+        [name] + row for name, row in zip(names, usage.astype(str).tolist())
+    ]
     return schedule_table, usage_table
 
 
-def plot_results(resources, projects, solver, job_start_vars):
-    schedule_table, usage_table = get_tables(
-        projects, resources, solver, job_start_vars
-    )
-
-    days = len(schedule_table[0]) - 1
-    jobs = [row[0] for row in schedule_table[1:]]
-    resources = usage_table[1:]
-
-    job_to_color = {job: i + 1 for i, job in enumerate(jobs)}
-    schedule_data = np.array(
-        [
-            [job_to_color[jobs[row_idx]] if cell else 0 for cell in row[1:]]
-            for row_idx, row in enumerate(schedule_table[1:])
-        ]
-    )
-
-    resource_data = np.array(
+def get_rows(instance: Instance, max_rows: int) -> tuple[np.ndarray, list[str]]:
+    """Assigns every job a Gantt row: one row per job, per project when there
+    are more than max_rows jobs but few projects, or per block of consecutive
+    jobs."""
+    n = instance.job_count
+    if n <= max_rows:
+        return np.arange(n), [f"{jobnr:>2}" for jobnr in instance.jobnr.tolist()]
+    if 1 < instance.project_count <= max_rows:
+        labels = [f"Project {pronr}" for pronr in instance.pronr.tolist()]
+        return instance.job_project, labels
+    rows = np.arange(n) * max_rows // n
+    first = np.searchsorted(rows, np.arange(max_rows))
+    last = np.append(first[1:], n) - 1
+    return rows, [f"Jobs {a + 1}-{b + 1}" for a, b in zip(first, last)]
+
+
+def downsample(usage: np.ndarray, max_days: int) -> tuple[np.ndarray, int]:
+    """Keeps the peak usage of every block of days so that at most max_days
+    columns remain, returning the profile and the days per column."""
+    days = usage.shape[1]
+    step = max(-(-days // max_days), 1)
+    if step == 1:
+        return usage, step
+    padded = np.zeros((usage.shape[0], -(-days // step) * step), dtype=usage.dtype)
+    padded[:, :days] = usage
+    return padded.reshape(usage.shape[0], -1, step).max(axis=2), step
+
+
+def plot_results(
+    instance: Instance,
+    starts: np.ndarray,
+    output: str = None,
+    max_rows: int = MAX_ROWS,
+    max_days: int = MAX_DAYS,
+):
+    """Draws the schedule as a Gantt chart above the resource usage profile.
+    The figure is shown, or written to output (.png, .svg, ...) with the Agg
+    backend when an output file is given."""
+    # matplotlib dominates the import time, it is only loaded to plot and
+    # pyplot only to show the figure
+    from matplotlib import colormaps
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+
+    starts = np.asarray(starts, dtype=np.int64)
+    durations = instance.durations.astype(np.int64)
+    rows, labels = get_rows(instance, max_rows)
+    usage, step = downsample(get_usage(instance, starts), max_days)
+    days = int((starts + durations).max(initial=0))
+    resources = [r.resname for r in instance.resources]
+
+    size = (12, min(max(len(labels) * 0.3 + 3, 5), 20))
+    ratios = {"height_ratios": [3, 1]}
+    if output:
+        figure = Figure(figsize=size)
+        axes = figure.subplots(2, 1, gridspec_kw=ratios)
+    else:
+        import matplotlib.pyplot as plt
+
+        figure, axes = plt.subplots(2, 1, figsize=size, gridspec_kw=ratios)
+
+    # one polygon per job, all drawn by a single collection
+    busy = durations > 0
+    x0, x1 = starts[busy], starts[busy] + durations[busy]
+    y0, y1 = rows[busy] - 0.4, rows[busy] + 0.4
+    vertices = np.stack(
         [
-            [int(cell) if cell.isdigit() else 0 for cell in row[1:]]
-            for row in usage_table[1:]
-        ]
-    )
-
-    _, axes = plt.subplots(
-        2,
-        1,
-        figsize=(12, len(jobs) * 0.7),
-        gridspec_kw={"height_ratios": [3, 1]},
+            np.stack(corner, axis=1)
+            for corner in ((x0, y0), (x0, y1), (x1, y1), (x1, y0))
+        ],
+        axis=1,
     )
-
-    cmap = plt.cm.get_cmap("tab20", len(jobs) + 1)
-    cmap_colors = cmap(np.arange(len(jobs) + 1))
-    cmap_colors[0] = [1, 1, 1, 1]
-    custom_cmap = mcolors.ListedColormap(cmap_colors)
-
-    axes[0].imshow(
-        schedule_data, cmap=custom_cmap, aspect="auto", interpolation="nearest"
+    colors = colormaps["tab20"](rows[busy] % 20)
+    axes[0].add_collection(
+        PolyCollection(
+            vertices,
+            facecolors=colors,
+            edgecolors="black" if len(labels) == instance.job_count else "none",
+            linewidths=0.3,
+        )
     )
-    axes[0].set_xticks(range(days))
-    axes[0].set_xticklabels(schedule_table[0][1:], rotation=45)
-    axes[0].set_yticks(range(len(jobs)))
-    axes[0].set_yticklabels(jobs)
-
+    axes[0].set_xlim(0, max(days, 1))
+    axes[0].set_ylim(len(labels) - 0.5, -0.5)
+    axes[0].set_yticks(range(len(labels)))
+    axes[0].set_yticklabels(labels, fontsize=8 if len(labels) > 30 else 10)
     axes[0].set_xlabel("Days")
-    axes[0].set_ylabel("Jobs")
+    axes[0].set_ylabel("Jobs" if len(labels) == instance.job_count else "Groups")
     axes[0].set_title("Schedule")
-
-    axes[0].set_xticks(np.arange(-0.5, days, 1), minor=True)
-    axes[0].set_yticks(np.arange(-0.5, len(jobs), 1), minor=True)
-
-    axes[0].grid(which="minor", color="black", linestyle=":", linewidth=0.5)
-    axes[0].tick_params(axis="both", which="major", size=0)
+    axes[0].grid(axis="x", color="black", linestyle=":", linewidth=0.5)
 
     axes[1].imshow(
-        resource_data, cmap="Oranges", aspect="auto", interpolation="nearest"
+        usage,
+        cmap="Oranges",
+        aspect="auto",
+        interpolation="nearest",
+        extent=(0, usage.shape[1] * step, len(resources) - 0.5, -0.5),
     )
-    axes[1].set_xticks(range(days))
-    axes[1].set_xticklabels(usage_table[0][1:], rotation=45)
+    axes[1].set_xlim(0, max(days, 1))
     axes[1].set_yticks(range(len(resources)))
-    axes[1].set_yticklabels([r[0] for r in resources])
-    axes[1].set_xlabel("Days")
+    axes[1].set_yticklabels(resources)
+    axes[1].set_xlabel("Days" if step == 1 else f"Days (peak per {step} days)")
     axes[1].set_ylabel("Resources")
     axes[1].set_title("Resource Usage")
 
-    axes[1].set_xticks(np.arange(-0.5, days, 1), minor=True)
-    axes[1].set_yticks(np.arange(-0.5, len(resources), 1), minor=True)
-
-    axes[1].grid(which="minor", color="black", linestyle=":", linewidth=0.5)
-    axes[1].tick_params(axis="both", which="major", size=0)
-
-    for i in range(len(resources)):
-        for j in range(days):
-            value = resource_data[i, j]
-            if value > 0:
-                axes[1].text(
-                    j,
-                    i,
-                    str(value),
-                    ha="center",
-                    va="center",
-                    fontsize=12,
-                    color="black",
-                    weight="bold",
-                )
-    plt.show()
+    # values only fit in the cells of small profiles
+    if usage.size <= ANNOTATE_CELLS:
+        for i, j in zip(*np.nonzero(usage)):
+            axes[1].text(
+                (j + 0.5) * step,
+                i,
+                str(usage[i, j]),
+                ha="center",
+                va="center",
+                fontsize=10,
+                color="black",
+                weight="bold",
+            )
+
+    figure.tight_layout()
+    if output:
+        figure.savefig(output)
+    else:
+        plt.show()
@@ -1,6 +1,8 @@
 from tabulate import tabulate
 
-from structs import Info, Project, Resource
+from structs import Info, Instance, Project, Resource
+
+from .plot import get_tables
 
 
 def print_info(info: Info):
@@ -82,6 +84,12 @@ def print_makespans(solutions: list[tuple[str, int]]):
     print_tabulate("Makespans", table)
 
 
+def print_schedule(instance: Instance, starts):
+    schedule_table, usage_table = get_tables(instance, starts)
+    print_tabulate("Schedule", schedule_table)
+    print_tabulate("Resource Usage", usage_table)
+
+
 def print_tables(info: Info, resources: list[Resource], projects: list[Project]):
     print_info(info)
     print_resources(resources)
@@ -0,0 +1,154 @@
+"""
+On-disk store of solver results, one .npz file per instance and problem.
+The key hashes the parsed instance and the solver parameters that define
+the answer (KEY_FIELDS), not those that only change how long or how it is
+searched, so a result can be reused, or improved with a larger time budget.
+Entries are evicted by age and, oldest use first, by the total size.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, astuple, dataclass
+
+import numpy as np
+
+from structs import Instance
+
+from .cache import ARRAY_FIELDS, CACHE_VERSION
+
+RESULTS_DIR = os.path.join(".cache", "results")
+KEY_FIELDS = (
+    "objective",
+    "makespan_weight",
+    "tiebreak",
+    "relative_gap",
+    "stop_after_first_solution",
+)
+MAX_BYTES = 256 << 20
+MAX_AGE = 30 * 24 * 3600
+
+
+@dataclass
+class CachedResult:
+    status: str
+    objective: float
+    bound: float
+    starts: np.ndarray
+    modes: np.ndarray
+    time_limit: float = None
+    stats: dict = None
+
+    @property
+    def budget(self) -> float:
+        return float("inf") if self.time_limit is None else self.time_limit
+
+    def covers(self, time_limit: float) -> bool:
+        """Whether solving again within time_limit cannot do better."""
+        budget = float("inf") if time_limit is None else time_limit
+        return self.status == "OPTIMAL" or budget <= self.budget
+
+    def replaces(self, cached) -> bool:
+        """Whether this result is better than the cached one, or as good and
+        searched with at least its budget."""
+        if cached is None:
+            return True
+        if self.objective != cached.objective:
+            return self.objective < cached.objective
+        return self.status == "OPTIMAL" or self.budget >= cached.budget
+
+    def __str__(self):
+        limit = "no time limit" if self.time_limit is None else f"{self.time_limit}s"
+        return (
+            f"Cached result: {self.status}, objective {self.objective}, "
+            f"bound {self.bound} ({limit})"
+        )
+
+
+def instance_hash(instance: Instance) -> str:
+    digest = hashlib.blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    digest.update(repr(astuple(instance.info)).encode())
+    digest.update(repr([astuple(r) for r in instance.resources]).encode())
+    for name in ARRAY_FIELDS:
+        array = np.ascontiguousarray(getattr(instance, name))
+        digest.update(f"{name}{array.dtype}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def result_key(instance: Instance, config) -> str:
+    parameters = {k: v for k, v in asdict(config).items() if k in KEY_FIELDS}
+    digest = hashlib.blake2b(instance_hash(instance).encode(), digest_size=16)
+    digest.update(json.dumps(parameters, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_result(key: str, cache_dir: str = RESULTS_DIR) -> CachedResult | None:
+    file_path = os.path.join(cache_dir, f"{key}.npz")
+    if not os.path.exists(file_path):
+        return None
+    try:
+        with np.load(file_path) as data:
+            meta = json.loads(str(data["meta"]))
+            result = CachedResult(starts=data["starts"], modes=data["modes"], **meta)
+    except (OSError, KeyError, ValueError, TypeError):
+        os.remove(file_path)
+        return None
+    # the modification time records the last use for eviction
+    os.utime(file_path)
+    return result
+
+
+def save_result(
+    key: str,
+    result: CachedResult,
+    cache_dir: str = RESULTS_DIR,
+    max_bytes: int = MAX_BYTES,
+    max_age: float = MAX_AGE,
+):
+    file_path = os.path.join(cache_dir, f"{key}.npz")
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = {k: v for k, v in asdict(result).items() if k not in ("starts", "modes")}
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(
+            file,
+            starts=np.asarray(result.starts, dtype=np.int64),
+            modes=np.asarray(result.modes, dtype=np.int64),
+            meta=np.array(json.dumps(meta)),
+        )
+    os.replace(tmp_path, file_path)
+    evict_results(cache_dir, max_bytes, max_age)
+
+
+def evict_results(
+    cache_dir: str = RESULTS_DIR, max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE
+) -> int:
+    """Removes the entries unused for max_age seconds, then the least recently
+    used until the store fits in max_bytes. Returns how many were removed."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz"):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    entries.sort()
+
+    now, total = time.time(), sum(size for _, size, _ in entries)
+    removed = 0
+    for used, size, name in entries:
+        if now - used <= max_age and total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_results(cache_dir: str = RESULTS_DIR):
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+        print(f"Cache cleared: {cache_dir}")
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = os.path.join(ROOT, "datasets")
+SCRIPTS = os.path.join(ROOT, "scripts")
+DATA = os.path.join(ROOT, "tests", "data")
+sys.path.insert(0, SCRIPTS)
+
+
+def dataset_path(name: str) -> str:
+    return os.path.join(DATASETS, f"p01_dataset_{name}.txt")
+
+
+@pytest.fixture
+def instance():
+    from utils import read_instance
+
+    return read_instance(dataset_path("08"))
+
+
+@pytest.fixture
+def projects():
+    """Four projects of 15 jobs each."""
+    from utils import read_instance
+
+    return read_instance(os.path.join(DATA, "projects.txt"))
+
+
+@pytest.fixture
+def multi_mode_instance():
+    """Two modes for most jobs, one single-mode job using the nonrenewable
+    resource."""
+    from utils import read_instance
+
+    return read_instance(os.path.join(DATA, "multi_mode.txt"))
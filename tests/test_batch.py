@@ -0,0 +1,16 @@
+import json
+
+from batch import run_batch
+from conftest import DATASETS
+from solver import SolverConfig
+
+
+def test_batch(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    config = SolverConfig(time_limit=10)
+    results = run_batch(DATASETS, output, jobs=2, cache=False, config=config)
+    assert len(results) == 4
+    assert all(r["status"] == "OPTIMAL" and r["valid"] for r in results)
+    with open(output) as file:
+        written = [json.loads(line) for line in file]
+    assert sorted(r["file"] for r in written) == sorted(r["file"] for r in results)
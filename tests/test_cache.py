@@ -0,0 +1,48 @@
+import os
+import shutil
+from dataclasses import fields
+
+import numpy as np
+from conftest import dataset_path
+from structs import Instance
+from utils import load_cached_instance, read_instance
+from utils.cache import file_hash
+
+
+def assert_same(a: Instance, b: Instance):
+    assert a.info == b.info
+    assert a.resources == b.resources
+    for f in fields(Instance):
+        if f.name not in ("info", "resources"):
+            assert np.array_equal(getattr(a, f.name), getattr(b, f.name)), f.name
+
+
+def test_instance_cache(tmp_path):
+    cache_dir = str(tmp_path / "instances")
+    file_path = dataset_path("20")
+    parsed = load_cached_instance(file_path, cache_dir)
+    assert os.listdir(cache_dir) == [f"{file_hash(file_path)}.npz"]
+    cached = load_cached_instance(file_path, cache_dir)
+    assert_same(cached, parsed)
+    assert_same(cached, read_instance(file_path))
+
+
+def test_instance_cache_changed_file(tmp_path):
+    cache_dir = str(tmp_path / "instances")
+    file_path = str(tmp_path / "dataset.txt")
+    shutil.copy(dataset_path("08"), file_path)
+    load_cached_instance(file_path, cache_dir)
+    shutil.copy(dataset_path("10"), file_path)
+    instance = load_cached_instance(file_path, cache_dir)
+    assert instance.job_count == read_instance(dataset_path("10")).job_count
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_instance_cache_corrupt_entry(tmp_path):
+    cache_dir = str(tmp_path / "instances")
+    file_path = dataset_path("08")
+    load_cached_instance(file_path, cache_dir)
+    cache_path = os.path.join(cache_dir, f"{file_hash(file_path)}.npz")
+    with open(cache_path, "wb") as file:
+        file.write(b"not an archive")
+    assert_same(load_cached_instance(file_path, cache_dir), read_instance(file_path))
@@ -0,0 +1,38 @@
+import pytest
+from solver import SolverConfig, heuristic_schedule, solve_decomposed, validate_schedule
+from solver import decompose
+
+
+def config(decomposition: str) -> SolverConfig:
+    return SolverConfig(
+        time_limit=2,
+        decomposition=decomposition,
+        neighbourhood=20,
+        iteration_time=0.5,
+        random_seed=0,
+    )
+
+
+@pytest.mark.parametrize("decomposition", ["projects", "window"])
+def test_decomposed(projects, decomposition):
+    starts, modes, objective, trajectory = solve_decomposed(
+        projects, config(decomposition)
+    )
+    assert validate_schedule(projects, starts, modes).valid
+    ends = starts + projects.mode_durations[projects.mode_ptr[:-1] + modes]
+    assert objective == ends.max()
+    # never worse than the heuristic schedule it starts from
+    assert objective == trajectory[-1][1] <= heuristic_schedule(projects)[2]
+    assert trajectory[0][1] >= objective
+
+
+def test_first_schedule(multi_mode_instance, monkeypatch):
+    """Without a serial schedule, the search starts from the full model's."""
+    monkeypatch.setattr(decompose, "heuristic_schedule", lambda *args: None)
+    starts, modes, _, _ = solve_decomposed(multi_mode_instance, config("window"))
+    assert validate_schedule(multi_mode_instance, starts, modes).valid
+
+
+def test_unknown_decomposition(projects):
+    with pytest.raises(ValueError):
+        solve_decomposed(projects, SolverConfig(decomposition="random"))
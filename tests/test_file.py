@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from conftest import dataset_path
+from utils import get_file_data, make_data, read_instance
+from utils.file import parse_instance
+
+
+def test_read_instance():
+    instance = read_instance(dataset_path("08"))
+    assert (instance.project_count, instance.job_count, instance.horizon) == (1, 8, 20)
+    assert [r.resname for r in instance.resources] == ["r1", "r2"]
+    assert instance.due_date.tolist() == [11]
+    assert instance.jobnr.tolist() == list(range(1, 9))
+    assert instance.durations[:3].tolist() == [2, 3, 4]
+    sources, targets = instance.arcs()
+    assert list(zip(sources.tolist(), targets.tolist()))[:3] == [(0, 1), (0, 2), (1, 3)]
+
+
+@pytest.mark.parametrize("name", ["08", "10", "20", "30"])
+def test_matches_legacy_parser(name):
+    file_path = dataset_path(name)
+    instance = read_instance(file_path)
+    legacy = make_data(get_file_data(file_path))
+    assert (instance.info, instance.resources, instance.projects()) == legacy
+
+
+def test_parse_lines():
+    with open(dataset_path("30")) as file:
+        parsed = parse_instance(file)
+    read = read_instance(dataset_path("30"))
+    assert parsed.info == read.info
+    assert np.array_equal(parsed.succ_idx, read.succ_idx)
+    assert np.array_equal(parsed.demands, read.demands)
@@ -0,0 +1,60 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from solver import PRIORITY_RULES, heuristic_schedule, validate_schedule
+from solver import heuristic
+from solver.heuristic import total_successors
+
+
+def reachable(instance, j: int) -> int:
+    sources, targets = instance.arcs()
+    seen, stack = set(), [j]
+    while stack:
+        for successor in targets[sources == stack.pop()].tolist():
+            if successor not in seen:
+                seen.add(successor)
+                stack.append(successor)
+    return len(seen)
+
+
+def test_total_successors(instance, projects):
+    for case in (instance, projects):
+        expected = [reachable(case, j) for j in range(case.job_count)]
+        assert total_successors(case).tolist() == expected
+
+
+@pytest.mark.parametrize("rule", PRIORITY_RULES)
+def test_heuristic_schedule(projects, rule):
+    starts, modes, makespan = heuristic_schedule(projects, rule, passes=3)
+    assert validate_schedule(projects, starts, modes).valid
+    ends = starts + projects.mode_durations[projects.mode_ptr[:-1] + modes]
+    assert makespan == ends.max()
+    assert np.all(starts >= 0)
+
+
+def fits_totals(instance, modes) -> bool:
+    """Checks the total demands of the modes against the nonrenewable
+    capacities."""
+    selected = instance.mode_ptr[:-1] + modes
+    demands = instance.mode_demands[selected][:, instance.per_total].sum(axis=0)
+    return bool(np.all(demands <= instance.capacity[instance.per_total]))
+
+
+def test_nonrenewable_modes(multi_mode_instance):
+    starts, modes, _ = heuristic_schedule(multi_mode_instance)
+    assert validate_schedule(multi_mode_instance, starts, modes).valid
+    assert fits_totals(multi_mode_instance, modes)
+
+
+def test_mode_search(multi_mode_instance, monkeypatch):
+    """The modes are searched for when the greedy repair gives up."""
+    instance = multi_mode_instance
+    monkeypatch.setattr(heuristic, "repair_modes", lambda *args: None)
+    assert fits_totals(instance, heuristic.select_modes(instance))
+    # and no modes fit below the least total demand
+    demands = instance.mode_demands[:, -1]
+    least = int(np.minimum.reduceat(demands, instance.mode_ptr[:-1]).sum())
+    instance.resources[-1] = replace(instance.resources[-1], resavail=least - 1)
+    assert heuristic.select_modes(instance) is None
+    assert heuristic_schedule(instance) is None
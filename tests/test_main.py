@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import utils
+from conftest import SCRIPTS, dataset_path
+from main import solve_dataset
+from solver import SolverConfig, heuristic_schedule
+
+
+def test_heuristic_only(instance, capsys):
+    solve_dataset(instance, SolverConfig(), heuristic_only=True)
+    starts, _, makespan = heuristic_schedule(instance)
+    out = capsys.readouterr().out
+    assert f"Heuristic makespan: {makespan}" in out
+    assert "Schedule valid" in out
+    assert "Resource Usage" not in out
+
+
+def test_heuristic_only_schedule(instance, capsys):
+    solve_dataset(instance, SolverConfig(), heuristic_only=True, schedule=True)
+    out = capsys.readouterr().out
+    assert "Heuristic makespan:" in out
+    assert "Resource Usage" in out
+
+
+def test_heuristic_only_plot(instance, monkeypatch):
+    plotted = []
+
+    def plot_results(*args, **kwargs):
+        plotted.append(args)
+
+    monkeypatch.setattr(utils, "plot_results", plot_results)
+    solve_dataset(instance, SolverConfig(), heuristic_only=True, plot={})
+    starts, _, _ = heuristic_schedule(instance)
+    assert len(plotted) == 1
+    assert plotted[0][1].tolist() == starts.tolist()
+
+
+@pytest.mark.parametrize("command", ["parse", "validate"])
+def test_lazy_imports(command, instance, tmp_path):
+    """Subcommands that do not solve never load OR-Tools."""
+    from utils import write_schedule
+
+    args = ["-f", dataset_path("08"), "--no-cache"]
+    if command == "validate":
+        schedule = str(tmp_path / "schedule.txt")
+        zeros = np.zeros(instance.job_count, dtype=np.int64)
+        write_schedule(schedule, instance, zeros, zeros)
+        args += ["--schedule", schedule]
+    code = (
+        "import runpy, sys\n"
+        f"sys.argv = ['main.py', {command!r}, *{args!r}]\n"
+        "try:\n"
+        "    runpy.run_path('main.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('ortools' in sys.modules)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SCRIPTS,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out.splitlines()[-1] == "False"
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from solver import STRATEGIES, SolverConfig, Strategy, solve_portfolio
+from solver.portfolio import share_workers, strategy_result
+
+
+def test_search_branching_applies():
+    from ortools.sat.python import cp_model
+
+    solver = cp_model.CpSolver()
+    SolverConfig(search_branching="FIXED_SEARCH").apply(solver)
+    assert "FIXED_SEARCH" in str(solver.parameters.search_branching)
+
+
+def test_unknown_search_branching():
+    from ortools.sat.python import cp_model
+
+    with pytest.raises(ValueError):
+        SolverConfig(search_branching="NO_SEARCH").apply(cp_model.CpSolver())
+
+
+def test_portfolio(instance):
+    result = solve_portfolio(instance, SolverConfig(time_limit=10))
+    assert set(result.results) == {s.name for s in STRATEGIES}
+    assert all(r["status"] == "OPTIMAL" for r in result.results.values())
+    assert result.status == "OPTIMAL"
+    assert result.objective == 10
+    assert len(result.starts) == instance.job_count
+
+
+def test_failing_strategy(instance):
+    strategies = (
+        Strategy("hinted", {"warm_start": "lft"}),
+        Strategy("broken", {"tiebreak": "unknown"}),
+    )
+    result = solve_portfolio(instance, SolverConfig(time_limit=10), None, strategies)
+    assert result.strategy == "hinted"
+    assert result.objective == 10
+    assert result.results["broken"]["status"] == "ERROR"
+    assert "unknown tiebreak mode" in result.results["broken"]["error"]
+
+
+def test_strategy_result_records_error():
+    class Failed:
+        def result(self):
+            raise RuntimeError("boom")
+
+    result = strategy_result(Failed())
+    assert result["status"] == "ERROR"
+    assert result["error"] == "RuntimeError: boom"
+
+
+def test_share_workers():
+    assert share_workers(SolverConfig(num_workers=8), 5) == 1
+    assert share_workers(SolverConfig(num_workers=20), 5) == 4
+    assert share_workers(SolverConfig(num_workers=2), 5) == 1
+    assert share_workers(SolverConfig(), 5) == max(1, os.cpu_count() // 5)
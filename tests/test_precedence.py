@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from ortools.sat.python import cp_model
+from solver import SolverConfig, Telemetry, solve_scheduling
+from solver import precedence
+from solver.precedence import PrecedenceGraph, emit_precedences, transitive_reduction
+
+
+def random_dag(rng, sizes, density):
+    """Random arcs within each project of the given sizes, jobs shuffled so
+    the numbering is not a topological order."""
+    arcs, ptr = set(), np.concatenate(([0], np.cumsum(sizes)))
+    for lo, hi in zip(ptr[:-1].tolist(), ptr[1:].tolist()):
+        order = lo + rng.permutation(hi - lo)
+        for i in range(hi - lo):
+            for k in range(i + 1, hi - lo):
+                if rng.random() < density:
+                    arcs.add((int(order[i]), int(order[k])))
+    sources, targets = np.array(sorted(arcs), dtype=np.int64).reshape(-1, 2).T
+    return int(ptr[-1]), sources, targets, ptr
+
+
+def implied(n, sources, targets):
+    """Marks the arcs (u, v) with v reached from another successor of u."""
+    successors = [[] for _ in range(n)]
+    for u, v in zip(sources.tolist(), targets.tolist()):
+        successors[u].append(v)
+
+    def reaches(w, v):
+        stack, seen = [w], {w}
+        while stack:
+            u = stack.pop()
+            if u == v:
+                return True
+            for x in successors[u]:
+                if x not in seen:
+                    seen.add(x)
+                    stack.append(x)
+        return False
+
+    return np.array(
+        [
+            any(w != v and reaches(w, v) for w in successors[u])
+            for u, v in zip(sources.tolist(), targets.tolist())
+        ],
+        dtype=bool,
+    )
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("sizes", [[40], [90], [12, 30, 7, 25]])
+def test_transitive_reduction(sizes, seed):
+    n, sources, targets, ptr = random_dag(np.random.default_rng(seed), sizes, 0.15)
+    keep = transitive_reduction(n, sources, targets, ptr)
+    assert np.array_equal(keep, ~implied(n, sources, targets))
+
+
+def test_transitive_reduction_blocks(monkeypatch):
+    # one project per block and several column blocks for the larger ones
+    monkeypatch.setattr(precedence, "GROUP_JOBS", 1)
+    monkeypatch.setattr(precedence, "BLOCK_WORDS", 1)
+    n, sources, targets, ptr = random_dag(np.random.default_rng(7), [150, 70, 3], 0.1)
+    keep = transitive_reduction(n, sources, targets, ptr)
+    assert np.array_equal(keep, ~implied(n, sources, targets))
+    assert transitive_reduction(n, sources, targets, ptr, max_work=0) is None
+
+
+def test_cycle():
+    sources, targets = np.array([0, 1, 2]), np.array([1, 2, 0])
+    with pytest.raises(ValueError, match="cycle"):
+        transitive_reduction(4, sources, targets)
+
+
+def test_emit_precedences():
+    n, sources, targets, _ = random_dag(np.random.default_rng(0), [30], 0.2)
+    model = cp_model.CpModel()
+    starts = [model.NewIntVar(0, 100, f"s{j}") for j in range(n)]
+    ends = [model.NewIntVar(0, 100, f"e{j}") for j in range(n)]
+    emit_precedences(model, PrecedenceGraph(sources, targets), starts, ends)
+    emitted = [
+        (c.linear.vars[0], c.linear.coeffs[0], c.linear.vars[1], c.linear.coeffs[1])
+        for c in model.Proto().constraints
+    ]
+    expected = [
+        (starts[v].Index(), 1, ends[u].Index(), -1)
+        for u, v in zip(sources.tolist(), targets.tolist())
+    ]
+    assert emitted == expected
+
+
+@pytest.mark.parametrize("projects", [1, 3])
+def test_same_optimum(tmp_path, projects):
+    from benchmarks.generate import GeneratorConfig, write_instance
+    from utils import read_instance
+
+    file_path = str(tmp_path / "instance.txt")
+    write_instance(file_path, GeneratorConfig(projects, 8, complexity=3, seed=2))
+    instance = read_instance(file_path)
+    results = []
+    for preprocess in (True, False):
+        telemetry = Telemetry()
+        config = SolverConfig(time_limit=10, preprocess=preprocess)
+        result = solve_scheduling(instance, config=config, telemetry=telemetry)
+        assert result.status == "OPTIMAL"
+        results.append((result.objective, telemetry.counts["removed_arcs"]))
+    (reduced, removed), (kept, none) = results
+    assert removed > 0 and none == 0
+    assert reduced == kept
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from conftest import dataset_path
+from solver import SolverConfig, compute_bounds, solve_scheduling
+from utils import read_instance
+
+
+def critical_path(instance):
+    """Earliest and latest starts by relaxing every arc until nothing moves."""
+    durations = instance.durations.tolist()
+    sources, targets = (a.tolist() for a in instance.arcs())
+    n, horizon = instance.job_count, instance.horizon
+    earliest, latest = [0] * n, [horizon - d for d in durations]
+    for _ in range(n):
+        changed = False
+        for u, v in zip(sources, targets):
+            if earliest[u] + durations[u] > earliest[v]:
+                earliest[v] = earliest[u] + durations[u]
+                changed = True
+            if latest[v] - durations[u] < latest[u]:
+                latest[u] = latest[v] - durations[u]
+                changed = True
+        if not changed:
+            break
+    return np.array(earliest), np.array(latest)
+
+
+@pytest.mark.parametrize("name", ["08", "10", "20", "30"])
+def test_bounds(name):
+    instance = read_instance(dataset_path(name))
+    bounds = compute_bounds(instance)
+    earliest, latest = critical_path(instance)
+    assert np.array_equal(bounds.earliest_start, earliest)
+    assert np.array_equal(bounds.latest_start, latest)
+    assert bounds.critical_path == (earliest + instance.durations).max()
+    result = solve_scheduling(instance, config=SolverConfig(time_limit=30))
+    assert result.status == "OPTIMAL"
+    assert bounds.lower_bound <= result.objective
@@ -0,0 +1,80 @@
+import os
+import time
+from dataclasses import replace
+
+import numpy as np
+from main import solve_dataset
+from solver import SolverConfig
+from utils import CachedResult, load_result, result_key, save_result
+from utils.results import evict_results
+
+
+def result(objective, status="FEASIBLE", time_limit=10):
+    zeros = np.zeros(3, dtype=np.int64)
+    return CachedResult(status, objective, 0.0, zeros, zeros, time_limit, {})
+
+
+def test_result_key(instance):
+    config = SolverConfig(time_limit=10)
+    key = result_key(instance, config)
+    # the search parameters do not change the answer
+    assert result_key(instance, replace(config, time_limit=60, num_workers=4)) == key
+    assert result_key(instance, replace(config, objective="tardiness")) != key
+    assert result_key(instance, replace(config, tiebreak="weighted")) != key
+    other = replace(instance, durations=instance.durations + 1)
+    assert result_key(other, config) != key
+
+
+def test_save_and_load(tmp_path):
+    cache_dir = str(tmp_path)
+    assert load_result("key", cache_dir) is None
+    save_result("key", result(12.0), cache_dir)
+    loaded = load_result("key", cache_dir)
+    assert loaded.objective == 12.0
+    assert loaded.time_limit == 10
+    assert np.array_equal(loaded.starts, np.zeros(3))
+
+
+def test_covers_and_replaces():
+    cached = result(12.0)
+    assert cached.covers(5) and cached.covers(10)
+    assert not cached.covers(20) and not cached.covers(None)
+    assert result(12.0, "OPTIMAL").covers(None)
+    assert result(11.0).replaces(cached)
+    assert not result(13.0, time_limit=60).replaces(cached)
+    assert result(12.0, time_limit=60).replaces(cached)
+    assert not result(12.0, time_limit=5).replaces(cached)
+
+
+def test_eviction(tmp_path):
+    cache_dir = str(tmp_path)
+    for key in ("old", "new"):
+        save_result(key, result(12.0), cache_dir)
+    old = os.path.join(cache_dir, "old.npz")
+    past = time.time() - 3600
+    os.utime(old, (past, past))
+    assert evict_results(cache_dir, max_age=60) == 1
+    assert os.listdir(cache_dir) == ["new.npz"]
+    assert evict_results(cache_dir, max_bytes=0) == 1
+
+
+def test_solve_uses_the_cache(instance, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    config = SolverConfig(time_limit=10)
+    solve_dataset(instance, config, results=True)
+    assert "Cached result" not in capsys.readouterr().out
+    cached = load_result(result_key(instance, config))
+    assert cached.status == "OPTIMAL"
+    assert cached.objective == 10
+
+    solve_dataset(instance, config, results=True)
+    out = capsys.readouterr().out
+    assert "Cached result: OPTIMAL, objective 10.0" in out
+    assert "Schedule valid" in out
+
+
+def test_weighted_tiebreak_caches_the_objective(instance, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = SolverConfig(time_limit=10, tiebreak="weighted")
+    solve_dataset(instance, config, results=True)
+    assert load_result(result_key(instance, config)).objective == 10
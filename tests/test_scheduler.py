@@ -0,0 +1,111 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from ortools.sat.python import cp_model
+from solver import Scheduler, SolverConfig, solve_scheduling, validate_schedule
+
+CONFIG = SolverConfig(time_limit=10)
+
+
+def solve(scheduler: Scheduler) -> int:
+    """Solves to optimality, checks the schedule and returns the makespan."""
+    assert scheduler.solve() == cp_model.OPTIMAL
+    starts, modes = scheduler.solution
+    assert validate_schedule(scheduler.instance, starts, modes).valid
+    return int(scheduler.solver.ObjectiveValue())
+
+
+def scratch(instance) -> int:
+    """The optimal makespan of a new model of the instance."""
+    result = solve_scheduling(instance, config=CONFIG)
+    assert result.status == "OPTIMAL"
+    return int(result.objective)
+
+
+def test_solve(instance):
+    assert solve(Scheduler(instance, CONFIG)) == 10
+
+
+def test_longer_duration(instance):
+    scheduler = Scheduler(instance, CONFIG)
+    solve(scheduler)
+    horizon = scheduler.instance.horizon
+    scheduler.set_duration(1, 3, 20)
+    assert scheduler.instance.horizon == horizon + 16
+    assert solve(scheduler) == scratch(scheduler.instance) > 10
+    # the instance passed in is left unchanged
+    assert instance.horizon == horizon
+
+
+def test_shorter_duration(instance):
+    scheduler = Scheduler(instance, CONFIG)
+    solve(scheduler)
+    scheduler.set_duration(1, 3, 1)
+    assert solve(scheduler) == scratch(scheduler.instance)
+    scheduler.set_duration(1, 3, 4)
+    assert solve(scheduler) == 10
+
+
+def test_unknown_job(instance):
+    scheduler = Scheduler(instance, CONFIG)
+    with pytest.raises(ValueError):
+        scheduler.set_duration(1, 99, 3)
+    with pytest.raises(ValueError):
+        scheduler.set_duration(1, 3, 3, mode=2)
+
+
+def test_capacity(instance):
+    scheduler = Scheduler(instance, CONFIG)
+    makespan = solve(scheduler)
+    scheduler.set_capacity("r2", 1)
+    assert solve(scheduler) == scratch(scheduler.instance) > makespan
+    scheduler.set_capacity("r1", 100)
+    scheduler.set_capacity("r2", 100)
+    assert solve(scheduler) == scratch(scheduler.instance) < makespan
+    with pytest.raises(ValueError):
+        scheduler.set_capacity("r9", 1)
+
+
+def test_nonrenewable_capacity(multi_mode_instance):
+    scheduler = Scheduler(multi_mode_instance, CONFIG)
+    solve(scheduler)
+    name = scheduler.instance.resources[-1].resname
+    demands = scheduler.instance.mode_demands[:, -1]
+    # the least consumption of every job fits, the chosen modes must follow
+    least = int(np.minimum.reduceat(demands, scheduler.instance.mode_ptr[:-1]).sum())
+    scheduler.set_capacity(name, least)
+    solve(scheduler)
+    starts, modes = scheduler.solution
+    selected = scheduler.instance.mode_ptr[:-1] + modes
+    assert demands[selected].sum() <= least
+    assert scheduler.solver.ObjectiveValue() == scratch(scheduler.instance)
+
+
+def test_add_projects(instance):
+    scheduler = Scheduler(instance, CONFIG)
+    solve(scheduler)
+    other = replace(instance, pronr=instance.pronr + 1)
+    scheduler.add_projects(other)
+    assert scheduler.instance.project_count == 2
+    assert scheduler.instance.horizon == 2 * instance.horizon
+    assert len(scheduler.job_vars.starts) == 2 * instance.job_count
+    assert solve(scheduler) == scratch(scheduler.instance)
+    with pytest.raises(ValueError):
+        scheduler.add_projects(other)
+
+
+def test_freeze(instance):
+    scheduler = Scheduler(instance, CONFIG)
+    with pytest.raises(ValueError):
+        scheduler.freeze(3)
+    solve(scheduler)
+    starts = scheduler.solution[0].copy()
+    frozen = scheduler.freeze(3)
+    assert frozen == int((starts < 3).sum())
+    # a longer job after the freeze cannot move the jobs already started
+    scheduler.set_duration(1, 4, 5)
+    solve(scheduler)
+    started = starts < 3
+    assert np.array_equal(scheduler.solution[0][started], starts[started])
+    assert scheduler.freeze(3) == 0
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from client import HOST, ServiceClient, ServiceError
+from conftest import dataset_path
+from service import Service
+from solver import validate_schedule
+
+
+@pytest.fixture
+def client():
+    """A client of a service running on its own event loop and a free port."""
+    service = Service(workers=1, max_time=10)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(service.handle, HOST, 0))
+    port = server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield ServiceClient(HOST, port, timeout=30)
+    service.close()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+
+def schedule(instance, job) -> tuple[np.ndarray, np.ndarray]:
+    rows = np.array(job["result"]["schedule"], dtype=np.int64)
+    assert np.array_equal(rows[:, 1], instance.jobnr)
+    return rows[:, 3], rows[:, 2] - 1
+
+
+def test_round_trip(client, instance):
+    job = client.submit_file(dataset_path("08"))
+    assert job["state"] in ("queued", "running")
+    assert job["time_limit"] == 10
+    events = list(client.events(job["id"]))
+    states = [e["state"] for e in events if e["event"] == "state"]
+    assert states[-1] == "done"
+    assert any(e["event"] == "incumbent" for e in events)
+    assert events[-1]["event"] == "end"
+
+    job = client.job(job["id"])
+    assert job["state"] == "done"
+    assert job["result"]["status"] == "OPTIMAL"
+    assert job["result"]["objective"] == 10
+    assert validate_schedule(instance, *schedule(instance, job)).valid
+    assert [j["id"] for j in client.jobs()] == [job["id"]]
+
+
+def test_weighted_tiebreak(client):
+    job = client.submit_file(dataset_path("08"), config={"tiebreak": "weighted"})
+    events = list(client.events(job["id"]))
+    incumbents = [e["objective"] for e in events if e["event"] == "incumbent"]
+    # the primary objective, not the weighted composite
+    assert incumbents[-1] == 10
+    assert client.job(job["id"])["result"]["objective"] == 10
+
+
+def test_rejected_jobs(client):
+    with open(dataset_path("08")) as file:
+        psplib = file.read()
+    for config in ({"unknown": 1}, {"tiebreak": "lexicographic"}, {"portfolio": 1}):
+        with pytest.raises(ServiceError) as e:
+            client.submit(psplib=psplib, config=config)
+        assert e.value.status == 400
+    with pytest.raises(ServiceError) as e:
+        client.submit(psplib="not an instance")
+    assert e.value.status == 400
+    with pytest.raises(ServiceError) as e:
+        client.job("missing")
+    assert e.value.status == 404
+
+
+def test_cancel(client, tmp_path):
+    from benchmarks.generate import GeneratorConfig, write_instance
+
+    # a search that runs until the time limit unless cancelled
+    file_path = str(tmp_path / "hard.txt")
+    write_instance(file_path, GeneratorConfig(10, 60, resource_strength=0.2))
+    job = client.submit_file(file_path)
+    for event in client.events(job["id"]):
+        if event["event"] == "incumbent":
+            client.cancel(job["id"])
+    job = client.job(job["id"])
+    assert job["state"] == "cancelled"
+    # the best schedule found before the cancel
+    assert job["result"]["status"] == "FEASIBLE"
+    assert job["result"]["wall_time"] < 10
@@ -0,0 +1,38 @@
+from solver import SolverConfig, Telemetry, solve_scheduling
+
+
+def solve(instance, tiebreak):
+    telemetry = Telemetry()
+    config = SolverConfig(time_limit=10, tiebreak=tiebreak)
+    result = solve_scheduling(instance, config=config, telemetry=telemetry)
+    return result, telemetry
+
+
+def test_lexicographic(instance):
+    result, telemetry = solve(instance, "lexicographic")
+    assert result.status == "OPTIMAL"
+    assert result.objective == 10
+    assert result.start_sum == result.starts.sum()
+    assert telemetry.stats["start_sum"] == result.starts.sum()
+    assert "tiebreak" in telemetry.phases
+    # each phase reports its own solver statistics
+    assert set(result.phases) == {"search", "tiebreak"}
+    assert telemetry.stats["tiebreak"] == result.phases["tiebreak"]
+    assert result.phases["search"]["objective"] == 10
+    # the least sum of start times among the optimal schedules
+    plain, _ = solve(instance, None)
+    assert result.starts.sum() <= plain.starts.sum()
+
+
+def test_weighted(instance):
+    result, telemetry = solve(instance, "weighted")
+    assert result.status == "OPTIMAL"
+    # the primary objective, not the weighted composite
+    assert result.objective == 10
+    assert result.bound == 10
+    assert telemetry.stats["objective"] == 10
+    assert telemetry.trace[-1][1] == 10
+    assert result.start_sum == result.starts.sum()
+    assert telemetry.stats["start_sum"] == result.starts.sum()
+    lexicographic, _ = solve(instance, "lexicographic")
+    assert result.start_sum == lexicographic.start_sum
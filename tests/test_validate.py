@@ -0,0 +1,78 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from main import validate_dataset
+from solver import heuristic_schedule, validate_schedule
+from utils import read_schedule, write_schedule
+
+
+@pytest.fixture
+def schedule(instance):
+    starts, modes, _ = heuristic_schedule(instance)
+    return starts, modes
+
+
+def test_valid(instance, schedule):
+    report = validate_schedule(instance, *schedule)
+    assert report.valid
+    assert str(report) == "Schedule valid"
+
+
+def test_precedence_and_capacity(instance):
+    report = validate_schedule(instance, np.zeros(instance.job_count, dtype=np.int64))
+    assert not report.valid
+    assert report.counts["precedence"] == len(instance.arcs()[0])
+    assert report.counts["capacity"] >= 1
+    assert str(report).startswith("Schedule invalid:")
+
+
+def test_release_and_horizon(instance, schedule):
+    starts, modes = schedule
+    starts = starts.copy()
+    starts[0] = -1
+    starts[-1] = instance.horizon
+    report = validate_schedule(instance, starts, modes)
+    assert report.counts["release"] == 1
+    assert report.counts["horizon"] == 1
+
+
+def test_mode_and_shape(instance, schedule):
+    starts, modes = schedule
+    report = validate_schedule(instance, starts, modes + 1)
+    assert report.counts == {"mode": instance.job_count}
+    report = validate_schedule(instance, starts[:-1], modes[:-1])
+    assert report.counts == {"shape": 1}
+
+
+def test_consumption(multi_mode_instance):
+    instance = multi_mode_instance
+    # the consumption of the first modes does not depend on the starts
+    starts = np.zeros(instance.job_count, dtype=np.int64)
+    total = int(instance.demands[:, -1].sum())
+    for capacity, valid in ((total, True), (total - 1, False)):
+        resources = list(instance.resources)
+        resources[-1] = replace(resources[-1], resavail=capacity)
+        report = validate_schedule(replace(instance, resources=resources), starts)
+        assert ("consumption" not in report.counts) == valid
+
+
+def test_schedule_file(instance, schedule, tmp_path, capsys):
+    file_path = str(tmp_path / "schedule.txt")
+    write_schedule(file_path, instance, *schedule)
+    starts, modes = read_schedule(file_path, instance)
+    assert np.array_equal(starts, schedule[0])
+    assert np.array_equal(modes, schedule[1])
+    assert validate_dataset(instance, file_path).valid
+    assert "Schedule valid" in capsys.readouterr().out
+
+
+def test_schedule_file_errors(instance, schedule, tmp_path):
+    file_path = str(tmp_path / "schedule.txt")
+    with pytest.raises(FileNotFoundError):
+        read_schedule(file_path, instance)
+    write_schedule(file_path, instance, *schedule)
+    rows = np.loadtxt(file_path, dtype=np.int64)
+    np.savetxt(file_path, rows[:-1], fmt="%d")
+    with pytest.raises(ValueError):
+        read_schedule(file_path, instance)